@@ -1,40 +1,60 @@
 from sqlalchemy.orm import Session
-from fastapi import Depends, HTTPException, Request, UploadFile, File, Form
+from sqlalchemy.ext.asyncio import AsyncSession
+from fastapi import Depends, HTTPException, Request, UploadFile, File, Form, Query
 from fastapi import APIRouter
-from fastapi.responses import JSONResponse, FileResponse
-from typing import List, Optional
+from fastapi.responses import JSONResponse, Response
+from typing import Dict, List, Optional, Union
 import tempfile
+import threading
+import asyncio
+import base64
+import json
 import os
 
-from app.db.session import get_db
-from app.services.tracker_service import TrackerService
-from app.schemas.torrent import TorrentCreate, TorrentResponse, TorrentAnnounceRequest
-from app.schemas.peer import PeerResponse, PeerListResponse
+from app.core.config import settings
+from app.db.session import SessionLocal, get_db, get_async_db
+from app.services.tracker_service import TrackerService, AsyncTrackerService, ANNOUNCE_INTERVAL
+from app.schemas.torrent import (
+    TorrentCreate, TorrentResponse, TorrentAnnounceRequest, BatchAnnounceRequest, BatchAnnounceResponse,
+    ScrapeRequest, ScrapeResponse
+)
+from app.schemas.peer import PeerResponse, PeerListResponse, CompactPeerListResponse
 from app.schemas.user import UserCreate, UserResponse
-from app.utils.torrent_generator import TorrentGenerator
+from app.utils.torrent_generator import TorrentGenerator, PieceHasher
 from app.utils.file_manager import FileManager
 from app.utils.bittorrent import BitTorrentUtils
 from app.services.auto_seeder_service import auto_seeder_manager
+from app.services.hashing_pool import hashing_pool
+from app.utils.content_store import ContentStore, content_store
 
 router = APIRouter()
 
+UPLOAD_CHUNK_SIZE = 1024 * 1024  # Bytes read from the upload stream at a time
+
 # Dependency injection
 def get_tracker_service(db: Session = Depends(get_db)):
     return TrackerService(db)
 
+def get_async_tracker_service(db: AsyncSession = Depends(get_async_db)):
+    return AsyncTrackerService(db)
+
 # Torrent management endpoints
 @router.post("/upload", response_model=TorrentResponse)
 async def upload_file_and_create_torrent(
     request: Request,
     file: UploadFile = File(...),
-    tracker_service: TrackerService = Depends(get_tracker_service)
+    wait: bool = True
 ):
-    """Upload a file and create a torrent for it"""
+    """Upload a file and create a torrent for it
+    
+    The upload is admitted to the hashing pool before any bytes are copied, then chunks
+    are written and hashed on the pool as they arrive and the torrent is created by the
+    same upload job. With wait=false the response is a 202 with the job ID to poll at
+    /upload/jobs/{job_id}.
+    """
     try:
         # Create directories for file storage
-        upload_dir = "uploads"
         torrent_dir = "torrents"
-        os.makedirs(upload_dir, exist_ok=True)
         os.makedirs(torrent_dir, exist_ok=True)
         
         # Save uploaded file with proper naming
@@ -46,112 +66,162 @@ async def upload_file_and_create_torrent(
         if not safe_filename or safe_filename.strip() == "":
             safe_filename = "uploaded_file"
         
-        uploaded_file_path = os.path.join(upload_dir, safe_filename)
+        # Take a hashing slot first, a full backlog answers 503 before the copy starts
+        job_id = hashing_pool.create_job(safe_filename)
         
-        # Handle duplicate filenames
-        counter = 1
-        original_path = uploaded_file_path
-        while os.path.exists(uploaded_file_path):
-            name_part = os.path.splitext(original_path)[0]
-            ext_part = os.path.splitext(original_path)[1]
-            uploaded_file_path = f"{name_part}_{counter}{ext_part}"
-            counter += 1
+        # Receive into a unique file, the content store files it by content once hashed
+        uploaded_file_path = content_store.incoming_path()
         
-        # Save the uploaded file
+        # Stream the upload to disk, hashing pieces as the chunks go by
+        hasher = PieceHasher(TorrentGenerator.DEFAULT_PIECE_LENGTH)
         with open(uploaded_file_path, "wb") as buffer:
-            content = await file.read()
-            buffer.write(content)
+            while True:
+                chunk = await file.read(UPLOAD_CHUNK_SIZE)
+                if not chunk:
+                    break
+                await hashing_pool.run(job_id, _write_and_hash, buffer, hasher, chunk)
         
-        try:
-            # Generate torrent metadata
-            tracker_url = "http://localhost:8000/api/tracker/announce"  # This should be configurable
-            torrent_data = TorrentGenerator.create_torrent_metadata(
-                uploaded_file_path, 
-                tracker_url
-            )
-            
-            # Update the torrent name to use the original filename
-            torrent_data['info']['name'] = safe_filename
-            
-            # Convert pieces hash from hex string to bytes
-            pieces_hash_bytes = bytes.fromhex(torrent_data['info']['pieces'])
+        # The uploader's address, resolved now because the job has no request
+        client_ip = request.client.host
+        if client_ip == "127.0.0.1" or client_ip == "localhost":
+            # For local development, try to get real IP from headers
+            client_ip = request.headers.get("x-forwarded-for", "127.0.0.1")
+            if "," in client_ip:
+                client_ip = client_ip.split(",")[0].strip()
+        
+        future = hashing_pool.submit(
+            job_id, _create_uploaded_torrent,
+            uploaded_file_path, safe_filename, hasher, torrent_dir, client_ip
+        )
+        
+        if not wait:
+            return JSONResponse(status_code=202, content={"job_id": job_id, "status": "queued"})
+        
+        return await asyncio.wrap_future(future)
             
+    except Exception as e:
+        if 'job_id' in locals():
+            hashing_pool.fail_job(job_id, str(getattr(e, 'detail', e)))
+        
+        # Clean up uploaded file if it exists
+        if 'uploaded_file_path' in locals() and os.path.exists(uploaded_file_path):
+            try:
+                os.unlink(uploaded_file_path)
+            except:
+                pass
+        
+        if isinstance(e, HTTPException) and e.status_code != 500:
+            raise e  # Re-raise HTTP exceptions (bad request, queue full) as-is
+        raise HTTPException(status_code=500, detail=f"Failed to create torrent: {str(getattr(e, 'detail', e))}")
+
+def _write_and_hash(buffer, hasher: PieceHasher, chunk: bytes):
+    buffer.write(chunk)
+    hasher.update(chunk)
+
+def _create_uploaded_torrent(uploaded_file_path: str, safe_filename: str, hasher: PieceHasher,
+                             torrent_dir: str, client_ip: str) -> TorrentResponse:
+    """Upload job: create the torrent of a fully received file and start seeding it
+    
+    The file is stored once per content. Uploading the same bytes under the same name
+    again keeps the existing torrent, .torrent file and seeder.
+    """
+    db = SessionLocal()
+    try:
+        tracker_service = TrackerService(db)
+        
+        # Generate torrent metadata from the hashes computed while saving
+        tracker_url = "http://localhost:8000/api/tracker/announce"  # This should be configurable
+        piece_hashes = hasher.finish()
+        torrent_data = TorrentGenerator.build_torrent_metadata(
+            safe_filename,
+            hasher.length,
+            piece_hashes,
+            tracker_url,
+            TorrentGenerator.DEFAULT_PIECE_LENGTH,
+            int(os.path.getctime(uploaded_file_path))
+        )
+        info_hash = torrent_data['info_hash']
+        
+        # Keep one copy of the bytes, however many times and names they are uploaded under
+        pieces_hash_bytes = b''.join(piece_hashes)
+        content_id = ContentStore.content_id(TorrentGenerator.DEFAULT_PIECE_LENGTH, hasher.length, pieces_hash_bytes)
+        stored_file_path, deduplicated = content_store.commit(uploaded_file_path, content_id)
+        content_store.link_name(stored_file_path, safe_filename)
+        if deduplicated:
+            print(f"♻️  {safe_filename} has the same content as an earlier upload, reusing it")
+        
+        torrent_filename = os.path.join(torrent_dir, f"{os.path.splitext(safe_filename)[0]}.torrent")
+        result = tracker_service.get_torrent(info_hash)
+        if result is None:
             # Create torrent in database
             torrent_create = TorrentCreate(
                 name=torrent_data['info']['name'],
                 file_size=torrent_data['info']['length'],
                 piece_length=torrent_data['info']['piece length'],
-                info_hash=torrent_data['info_hash'],
+                info_hash=info_hash,
                 num_pieces=len(pieces_hash_bytes) // 20,  # Each SHA-1 hash is 20 bytes
                 pieces_hash=pieces_hash_bytes
             )
-            
             result = tracker_service.create_torrent(torrent_create)
-            
-            # Save the .torrent file in the torrents directory
-            torrent_filename = os.path.join(torrent_dir, f"{os.path.splitext(safe_filename)[0]}.torrent")
+        
+        # Save the .torrent file in the torrents directory, and with the torrent for downloads,
+        # unless this torrent already has one: its ETag stays valid for clients that cached it
+        stored = tracker_service.get_torrent_file(info_hash)
+        if stored is None:
             TorrentGenerator.save_torrent_file(torrent_data, torrent_filename)
+            tracker_service.store_torrent_file(info_hash, TorrentGenerator.serialize_torrent(torrent_data))
+        elif not os.path.exists(torrent_filename):
+            with open(torrent_filename, "wb") as f:
+                f.write(stored[0])
+        
+        # Automatically start P2P seeder server for this file (a no-op when it is already seeded)
+        try:
+            auto_seeder_manager.add_seeder(torrent_filename, stored_file_path)
+            print(f"🚀 Auto-started P2P seeder for {safe_filename}")
+        except Exception as seeder_error:
+            print(f"Warning: Failed to auto-start seeder: {seeder_error}")
+        
+        # Automatically register the uploader as a seeder
+        try:
+            # Create announce request for the uploader (as completed seeder)
+            # Generate consistent peer ID for uploader as seeder
+            uploader_peer_id = BitTorrentUtils.generate_peer_id("P2PS", torrent_data['info_hash'], client_ip)
             
-            # Automatically start P2P seeder server for this file
-            try:
-                auto_seeder_manager.add_seeder(torrent_filename, uploaded_file_path)
-                print(f"🚀 Auto-started P2P seeder for {safe_filename}")
-            except Exception as seeder_error:
-                print(f"Warning: Failed to auto-start seeder: {seeder_error}")
-            
-            # Automatically register the uploader as a seeder
-            try:
-                client_ip = request.client.host
-                if client_ip == "127.0.0.1" or client_ip == "localhost":
-                    # For local development, try to get real IP from headers
-                    client_ip = request.headers.get("x-forwarded-for", "127.0.0.1")
-                    if "," in client_ip:
-                        client_ip = client_ip.split(",")[0].strip()
-                
-                # Create announce request for the uploader (as completed seeder)
-                # Generate consistent peer ID for uploader as seeder
-                uploader_peer_id = BitTorrentUtils.generate_peer_id("P2PS", torrent_data['info_hash'], client_ip)
-                
-                uploader_announce = TorrentAnnounceRequest(
-                    info_hash=torrent_data['info_hash'],
-                    peer_id=uploader_peer_id,  # Use consistent peer ID for uploader
-                    port=6881,  # Default BitTorrent port
-                    uploaded=torrent_data['info']['length'],  # They have uploaded the full file
-                    downloaded=torrent_data['info']['length'],  # They have the complete file
-                    left=0,  # Nothing left to download
-                    event="completed",  # They completed the download (seeding)
-                    compact=0
-                )
-                
-                # Register the uploader as a peer/seeder
-                tracker_service.announce(uploader_announce, client_ip)
-                
-            except Exception as peer_reg_error:
-                # Don't fail the upload if peer registration fails, just log it
-                print(f"Warning: Failed to register uploader as peer: {peer_reg_error}")
-            
-            return result
+            uploader_announce = TorrentAnnounceRequest(
+                info_hash=torrent_data['info_hash'],
+                peer_id=uploader_peer_id,  # Use consistent peer ID for uploader
+                port=6881,  # Default BitTorrent port
+                uploaded=torrent_data['info']['length'],  # They have uploaded the full file
+                downloaded=torrent_data['info']['length'],  # They have the complete file
+                left=0,  # Nothing left to download
+                event="completed",  # They completed the download (seeding)
+                compact=0
+            )
             
-        except HTTPException as he:
-            # Clean up uploaded file if torrent creation fails
-            if os.path.exists(uploaded_file_path):
-                os.unlink(uploaded_file_path)
-            raise he  # Re-raise HTTP exceptions as-is
-        except Exception as e:
-            # Clean up uploaded file if torrent creation fails
-            if os.path.exists(uploaded_file_path):
-                os.unlink(uploaded_file_path)
-            raise e
+            # Register the uploader as a peer/seeder
+            tracker_service.announce(uploader_announce, client_ip)
             
-    except Exception as e:
-        # Clean up uploaded file if it exists
-        if 'uploaded_file_path' in locals() and os.path.exists(uploaded_file_path):
-            try:
-                os.unlink(uploaded_file_path)
-            except:
-                pass
+        except Exception as peer_reg_error:
+            # Don't fail the upload if peer registration fails, just log it
+            print(f"Warning: Failed to register uploader as peer: {peer_reg_error}")
+        
+        return result
         
-        raise HTTPException(status_code=500, detail=f"Failed to create torrent: {str(e)}")
+    except Exception:
+        # Clean up uploaded file if torrent creation fails before it reached the store
+        if os.path.exists(uploaded_file_path):
+            os.unlink(uploaded_file_path)
+        raise
+    finally:
+        db.close()
+
+@router.get("/upload/jobs/{job_id}")
+def get_upload_job(job_id: str):
+    """Get the status of an upload job: receiving, queued, hashing, completed or failed"""
+    job = hashing_pool.get_job(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Upload job not found")
+    return job
 
 @router.post("/torrents", response_model=TorrentResponse)
 def create_torrent(
@@ -163,11 +233,20 @@ def create_torrent(
 
 @router.get("/torrents", response_model=List[TorrentResponse])
 def list_torrents(
+    response: Response,
     limit: int = 100,
+    sort: str = "created_at",
+    cursor: Optional[str] = None,
     tracker_service: TrackerService = Depends(get_tracker_service)
 ):
-    """List all torrents"""
-    return tracker_service.list_torrents(limit)
+    """List torrents a page at a time (sort by created_at, seeders or name)
+    
+    When more torrents follow, the X-Next-Cursor header holds the cursor of the next page.
+    """
+    torrents, next_cursor = tracker_service.list_torrents(limit, sort, cursor)
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
+    return torrents
 
 @router.get("/torrents/{info_hash}", response_model=TorrentResponse)
 def get_torrent(
@@ -180,50 +259,150 @@ def get_torrent(
         raise HTTPException(status_code=404, detail="Torrent not found")
     return torrent
 
+@router.get("/torrents/{info_hash}/pieces")
+def get_piece_hashes(
+    info_hash: str,
+    tracker_service: TrackerService = Depends(get_tracker_service)
+):
+    """Get the concatenated 20-byte SHA-1 piece hashes of a torrent"""
+    pieces_hash = tracker_service.get_piece_hashes(info_hash)
+    if pieces_hash is None:
+        raise HTTPException(status_code=404, detail="Torrent not found")
+    return Response(content=pieces_hash, media_type="application/octet-stream")
+
 @router.get("/torrents/{info_hash}/download")
 def download_torrent_file(
     info_hash: str,
+    request: Request,
     tracker_service: TrackerService = Depends(get_tracker_service)
 ):
-    """Download the .torrent file for a specific torrent"""
+    """Download the .torrent file for a specific torrent
+    
+    Served from the bytes stored with the torrent, with a strong ETag so clients
+    revalidating with If-None-Match get a 304 without the body.
+    """
     torrent = tracker_service.get_torrent(info_hash)
     if not torrent:
         raise HTTPException(status_code=404, detail="Torrent not found")
     
-    # Construct the torrent file path
     torrent_filename = f"{os.path.splitext(torrent.name)[0]}.torrent"
-    torrent_file_path = os.path.join("torrents", torrent_filename)
     
-    # Check if the torrent file exists
-    if not os.path.exists(torrent_file_path):
-        # If not found, try to regenerate it
-        try:
-            # Create torrent metadata
-            tracker_url = "http://localhost:8000/api/tracker/announce"
-            uploaded_file_path = os.path.join("uploads", torrent.name)
-            
-            if os.path.exists(uploaded_file_path):
-                torrent_data = TorrentGenerator.create_torrent_metadata(
-                    uploaded_file_path, 
-                    tracker_url
-                )
-                os.makedirs("torrents", exist_ok=True)
-                TorrentGenerator.save_torrent_file(torrent_data, torrent_file_path)
-            else:
-                raise HTTPException(status_code=404, detail="Original file not found, cannot regenerate torrent")
-        except Exception as e:
-            raise HTTPException(status_code=500, detail=f"Failed to regenerate torrent file: {str(e)}")
+    etag = tracker_service.get_torrent_etag(info_hash)
+    if etag and _etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers={"ETag": f'"{etag}"'})
+    
+    stored = tracker_service.get_torrent_file(info_hash)
+    if stored is None:
+        # Torrents from before the bytes were stored: import the file from disk once.
+        # Files are named by upload name, so the one on disk may belong to another torrent
+        torrent_file_path = os.path.join("torrents", torrent_filename)
+        content = None
+        if os.path.exists(torrent_file_path):
+            with open(torrent_file_path, "rb") as f:
+                content = f.read()
+        if content is None or not _torrent_file_matches(content, info_hash):
+            uploaded_file_path = content_store.find(
+                torrent.name, torrent.piece_length, torrent.file_size,
+                tracker_service.get_piece_hashes(info_hash) or b""
+            )
+            # Leave another torrent's file in place, the rebuilt bytes only go to the database
+            _queue_torrent_regeneration(
+                info_hash, torrent.name, uploaded_file_path, torrent_file_path if content is None else None
+            )
+        
+        etag = tracker_service.store_torrent_file(info_hash, content)
+        stored = content, etag
+    
+    content, etag = stored
+    return Response(
+        content=content,
+        media_type='application/x-bittorrent',
+        headers={
+            "ETag": f'"{etag}"',
+            "Content-Disposition": f'attachment; filename="{torrent_filename}"'
+        }
+    )
+
+def _torrent_file_matches(content: bytes, info_hash: str) -> bool:
+    """Whether the bytes of a .torrent file describe the torrent with this info hash"""
+    try:
+        info = json.loads(content)['info']
+        return TorrentGenerator.calculate_info_hash(info) == info_hash
+    except (ValueError, KeyError, TypeError):
+        return False
+
+def _etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Weak comparison of an If-None-Match header against an ETag, as RFC 9110 specifies"""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate.startswith("W/"):
+            candidate = candidate[2:]
+        if candidate.strip('"') == etag:
+            return True
+    return False
+
+# info_hash -> job_id of .torrent files being rebuilt from their uploads
+_regeneration_jobs: Dict[str, str] = {}
+_regeneration_lock = threading.Lock()
+
+def _queue_torrent_regeneration(info_hash: str, name: str, uploaded_file_path: Optional[str],
+                                torrent_file_path: Optional[str]):
+    """Rebuild a missing .torrent file on the hashing pool, never in the request
+    
+    Always raises: 404 when the upload is gone, otherwise 503 with the job to wait for.
+    """
+    if uploaded_file_path is None:
+        raise HTTPException(status_code=404, detail="Original file not found, cannot regenerate torrent")
+    
+    with _regeneration_lock:
+        job_id = _regeneration_jobs.get(info_hash)
+        job = hashing_pool.get_job(job_id) if job_id else None
+        if job is None or job['status'] == 'failed':
+            job_id = hashing_pool.create_job(name, regeneration=True)
+            _regeneration_jobs[info_hash] = job_id
+            hashing_pool.submit(job_id, _regenerate_torrent_file, info_hash, name, uploaded_file_path, torrent_file_path)
     
-    return FileResponse(
-        path=torrent_file_path,
-        filename=torrent_filename,
-        media_type='application/x-bittorrent'
+    raise HTTPException(
+        status_code=503,
+        detail=f"Torrent file is being regenerated (upload job {job_id})",
+        headers={"Retry-After": "5"}
     )
 
+def _regenerate_torrent_file(info_hash: str, name: str, uploaded_file_path: str,
+                             torrent_file_path: Optional[str]) -> str:
+    """Upload job: rehash the original upload and store the rebuilt .torrent file
+    
+    The file is also written to torrent_file_path when given.
+    """
+    tracker_url = "http://localhost:8000/api/tracker/announce"
+    # Stored uploads are named by content, the torrent keeps its upload name
+    torrent_data = TorrentGenerator.build_torrent_metadata(
+        name,
+        os.path.getsize(uploaded_file_path),
+        TorrentGenerator.calculate_piece_hashes(uploaded_file_path),
+        tracker_url,
+        creation_date=int(os.path.getctime(uploaded_file_path))
+    )
+    if torrent_file_path is not None:
+        os.makedirs("torrents", exist_ok=True)
+        TorrentGenerator.save_torrent_file(torrent_data, torrent_file_path)
+    
+    db = SessionLocal()
+    try:
+        return TrackerService(db).store_torrent_file(info_hash, TorrentGenerator.serialize_torrent(torrent_data))
+    finally:
+        db.close()
+        with _regeneration_lock:
+            _regeneration_jobs.pop(info_hash, None)
+
 # Peer tracking endpoints
-@router.get("/announce", response_model=PeerListResponse)
-@router.post("/announce", response_model=PeerListResponse)
-def announce(
+@router.get("/announce", response_model=Union[PeerListResponse, CompactPeerListResponse])
+@router.post("/announce", response_model=Union[PeerListResponse, CompactPeerListResponse])
+async def announce(
     request: Request,
     info_hash: str,
     peer_id: str,
@@ -233,9 +412,15 @@ def announce(
     left: int = 0,
     event: Optional[str] = None,
     ip: Optional[str] = None,
-    tracker_service: TrackerService = Depends(get_tracker_service)
+    compact: int = 0,
+    numwant: Optional[int] = None,
+    tracker_service: AsyncTrackerService = Depends(get_async_tracker_service)
 ):
-    """Handle peer announce requests (both GET and POST)"""
+    """Handle peer announce requests (both GET and POST)
+    
+    With compact=1 peers are returned as packed 6-byte IPv4+port entries: base64
+    encoded in JSON, or as a raw body when the client accepts application/octet-stream.
+    """
     # Get client IP
     client_ip = request.client.host
     
@@ -247,18 +432,65 @@ def announce(
         uploaded=uploaded,
         downloaded=downloaded,
         left=left,
-        event=event
+        event=event,
+        compact=compact,
+        numwant=numwant
     )
     
-    return tracker_service.announce(announce_data, client_ip)
+    if compact == 1:
+        packed_peers = await tracker_service.announce_compact(announce_data, client_ip)
+        
+        if "application/octet-stream" in request.headers.get("accept", ""):
+            return Response(
+                content=packed_peers,
+                media_type="application/octet-stream",
+                headers={
+                    "X-Announce-Interval": str(ANNOUNCE_INTERVAL),
+                    "X-Announce-Min-Interval": str(settings.ANNOUNCE_MIN_INTERVAL)
+                }
+            )
+        
+        # Bypass response model validation, the payload is already final
+        return JSONResponse({
+            "peers": base64.b64encode(packed_peers).decode("ascii"),
+            "interval": ANNOUNCE_INTERVAL,
+            "min_interval": settings.ANNOUNCE_MIN_INTERVAL
+        })
+    
+    return await tracker_service.announce(announce_data, client_ip)
+
+@router.post("/announce/batch", response_model=BatchAnnounceResponse)
+async def announce_batch(
+    request: Request,
+    batch: BatchAnnounceRequest,
+    tracker_service: AsyncTrackerService = Depends(get_async_tracker_service)
+):
+    """Announce many torrents in one request, e.g. a seeder registering everything it serves"""
+    return await tracker_service.announce_batch(batch.announces, request.client.host)
+
+@router.get("/scrape", response_model=ScrapeResponse)
+async def scrape(
+    info_hash: List[str] = Query(...),
+    tracker_service: AsyncTrackerService = Depends(get_async_tracker_service)
+):
+    """Get seeder/leecher/completed counts for one or more torrents (repeat info_hash)"""
+    return await tracker_service.scrape(info_hash)
+
+@router.post("/scrape", response_model=ScrapeResponse)
+async def scrape_many(
+    scrape_request: ScrapeRequest,
+    tracker_service: AsyncTrackerService = Depends(get_async_tracker_service)
+):
+    """Get seeder/leecher/completed counts for a large list of torrents"""
+    return await tracker_service.scrape(scrape_request.info_hashes)
 
 @router.get("/peers/{info_hash}", response_model=List[PeerResponse])
-def get_peers(
+async def get_peers(
     info_hash: str,
-    tracker_service: TrackerService = Depends(get_tracker_service)
+    tracker_service: AsyncTrackerService = Depends(get_async_tracker_service)
 ):
     """Get active peers for a torrent"""
-    return tracker_service.get_peers(info_hash)
+    return await tracker_service.get_peers(info_hash)
 
 @router.post("/torrents/{info_hash}/seed")
 def register_as_seeder(
@@ -298,7 +530,7 @@ def register_as_seeder(
         return {
             "message": f"Successfully registered as seeder for {torrent.name}",
             "info_hash": info_hash,
-            "peer_count": len(tracker_service.get_peers(info_hash))
+            "peer_count": tracker_service.get_peer_count(info_hash)
         }
         
     except HTTPException:
@@ -328,11 +560,11 @@ def get_user_by_peer_id(
 
 # Statistics endpoint
 @router.get("/stats")
-def get_tracker_stats(
-    tracker_service: TrackerService = Depends(get_tracker_service)
+async def get_tracker_stats(
+    tracker_service: AsyncTrackerService = Depends(get_async_tracker_service)
 ):
     """Get tracker statistics"""
-    stats = tracker_service.get_tracker_stats()
+    stats = await tracker_service.get_tracker_stats()
     
     # Add seeder info
     seeder_info = auto_seeder_manager.get_seeder_info()
@@ -341,6 +573,14 @@ def get_tracker_stats(
     
     return stats
 
+@router.get("/stats/{info_hash}")
+async def get_torrent_stats(
+    info_hash: str,
+    tracker_service: AsyncTrackerService = Depends(get_async_tracker_service)
+):
+    """Get seeder, leecher and completed counts for a single torrent"""
+    return await tracker_service.get_torrent_stats(info_hash)
+
 @router.get("/seeders")
 def get_active_seeders():
     """Get information about active P2P seeder servers"""
@@ -372,14 +612,3 @@ def cleanup_localhost_peers(
         return {"message": f"Removed {count} localhost peers"}
     except Exception as e:
         return {"error": f"Failed to cleanup peers: {e}"}
-
-@router.post("/peers/deduplicate")
-def deduplicate_peers(
-    tracker_service: TrackerService = Depends(get_tracker_service)
-):
-    """Remove duplicate peers (same IP:port for same torrent)"""
-    try:
-        count = tracker_service.deduplicate_peers()
-        return {"message": f"Removed {count} duplicate peers"}
-    except Exception as e:
-        return {"error": f"Failed to deduplicate peers: {e}"}
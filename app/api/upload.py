@@ -10,5 +10,5 @@ def get_upload_file_service(db: Session = Depends(get_db)):
   return UploadService(db)
 
 @router.post("/upload")
-async def upload(file: UploadFile, upload_file_service: UploadService = Depends(get_upload_file_service)):
-  return await upload_file_service.upload_file(file=file)
\ No newline at end of file
+async def upload(file: UploadFile, wait: bool = True, upload_file_service: UploadService = Depends(get_upload_file_service)):
+  return await upload_file_service.upload_file(file=file, wait=wait)
\ No newline at end of file
@@ -1,11 +1,57 @@
+from typing import Dict, List
 from pydantic_settings import BaseSettings
 from app.core.upload_config import *
 
 class Settings(BaseSettings):
   PROJECT_NAME: str = "default"
   DATABASE_URL: str = "sqlite:///app/db/p2p.db"
+  ASYNC_DATABASE_URL: str = "sqlite+aiosqlite:///app/db/p2p.db"  # Same database, used by async endpoints
   TRACKER_URL: str = "http://localhost:8000/api/tracker"
 
+  # SQLite storage profile, applied to every new connection
+  SQLITE_JOURNAL_MODE: str = "WAL"  # Readers no longer block the writer
+  SQLITE_SYNCHRONOUS: str = "NORMAL"  # With WAL, fsync at checkpoints instead of every commit
+  SQLITE_CACHE_SIZE: int = -65536  # Page cache, negative values are KiB (64 MiB)
+  SQLITE_MMAP_SIZE: int = 268435456  # Bytes of the database file memory-mapped (256 MiB)
+  SQLITE_BUSY_TIMEOUT: int = 5000  # Milliseconds to wait on a locked database before failing
+
+  # Connection pool
+  DB_POOL_SIZE: int = 10
+  DB_MAX_OVERFLOW: int = 20
+  DB_POOL_TIMEOUT: int = 30  # Seconds to wait for a free connection
+
+  UDP_TRACKER_ENABLED: bool = True  # Serve the UDP tracker protocol alongside HTTP
+  UDP_TRACKER_HOST: str = "0.0.0.0"
+  UDP_TRACKER_PORT: int = 6969
+  ANNOUNCE_MIN_INTERVAL: int = 300  # Seconds a peer must wait between announces, 0 disables throttling
+  ANNOUNCE_BURST: int = 3  # Announces a peer may make back to back before min_interval applies
+  ANNOUNCE_NUMWANT_DEFAULT: int = 50  # Peers returned when the client sends no numwant
+  ANNOUNCE_NUMWANT_MAX: int = 200  # Server-side cap on numwant
+  PEER_SELECTION_SEEDER_SHARE: float = 0.5  # Fraction of a leecher's peer list given to seeders when available
+  PEER_SELECTION_OVERSAMPLE: int = 2  # Leechers drawn per slot before keeping the most complete, 1 for uniform
+  # Nearby peers first: "off", "ip" (same address), "subnet" (same PEER_LOCALITY_PREFIX network)
+  # or "site" (same PEER_LOCALITY_SITES entry, else same subnet)
+  PEER_LOCALITY: str = "off"
+  PEER_LOCALITY_PREFIX: int = 24  # IPv4 prefix length of a subnet
+  PEER_LOCALITY_SITES: Dict[str, List[str]] = {}  # Site name -> CIDRs, e.g. {"paris": ["10.1.0.0/16"]}, JSON in the environment
+  PEER_LOCALITY_REMOTE_SHARE: float = 0.2  # Fraction of the peer list left to non-local peers when enough local ones exist
+  ANNOUNCE_BATCH_MAX: int = 5000  # Announces accepted per batch announce request
+  TORRENT_PAGE_MAX: int = 500  # Largest page of /torrents
+  SCRAPE_MAX_HASHES: int = 1000  # Info hashes accepted per scrape request
+  SWARM_WRITE_QUEUE_SIZE: int = 10000  # Pending peer/torrent writes before new ones are shed (deletes are kept)
+  SWARM_WRITE_BATCH_SIZE: int = 500  # Writes committed per group commit at most
+  SWARM_WRITE_FLUSH_MS: int = 10  # Durability window: max delay before a queued write is committed
+  SWARM_RECONCILE_INTERVAL: int = 300  # Seconds between seeder/leecher counter reconciliations
+  PEER_REAPER_INTERVAL: int = 60  # Seconds between expired peer sweeps
+  PEER_REAPER_BATCH_SIZE: int = 500  # Peers deleted per reaper transaction
+  TORRENT_CACHE_SIZE: int = 10000  # info_hash lookups kept in the LRU torrent cache
+  TORRENT_CACHE_NEGATIVE_TTL: int = 60  # Seconds an unknown info_hash is remembered as unknown
+  HASH_WORKERS: int = 2  # Threads hashing uploads and generating torrent metadata
+  HASH_QUEUE_SIZE: int = 16  # Upload jobs waiting for a worker before uploads get 503
+  HASH_REGENERATION_JOBS: int = 1  # .torrent rebuilds queued or running at once, keep below HASH_WORKERS
+  UPLOAD_JOB_HISTORY: int = 1000  # Finished upload jobs kept for status polling
+  TRACKER_STATS_TTL: int = 10  # Seconds a stats snapshot is served before it is recomputed
+
   class Config:
     env_file = ".env"
     
@@ -1,8 +1,47 @@
+from sqlalchemy import inspect, text
+
 from app.db.base import Base
 from app.db.session import engine
 
 def init_db():
+    _upgrade_peers_table()
     Base.metadata.create_all(bind=engine)
+    _add_missing_columns()
+    
+    # create_all skips indexes added to tables that already exist
+    for table in Base.metadata.sorted_tables:
+        for index in table.indexes:
+            index.create(bind=engine, checkfirst=True)
+
+def _upgrade_peers_table():
+    """Drop a peers table created with the old globally unique peer_id
+    
+    Peers are soft state that clients re-announce every interval, so the table
+    is simply recreated with the per-torrent unique keys.
+    """
+    inspector = inspect(engine)
+    if not inspector.has_table("peers"):
+        return
+    
+    constraints = {c["name"] for c in inspector.get_unique_constraints("peers")}
+    if "uq_peers_torrent_id_peer_id" not in constraints:
+        with engine.begin() as connection:
+            connection.execute(text("DROP TABLE peers"))
+
+def _add_missing_columns():
+    """Add columns introduced after a table was created
+    
+    create_all only creates missing tables, so new nullable columns are added
+    to existing ones with ALTER TABLE.
+    """
+    inspector = inspect(engine)
+    with engine.begin() as connection:
+        for table in Base.metadata.sorted_tables:
+            existing = {column["name"] for column in inspector.get_columns(table.name)}
+            for column in table.columns:
+                if column.name not in existing:
+                    column_type = column.type.compile(dialect=engine.dialect)
+                    connection.execute(text(f"ALTER TABLE {table.name} ADD COLUMN {column.name} {column_type}"))
 
 if __name__ == "__main__":
     init_db()
\ No newline at end of file
@@ -1,10 +1,36 @@
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
 from sqlalchemy.orm import sessionmaker
 from app.core.config import settings
 
-engine = create_engine(settings.DATABASE_URL, connect_args={"check_same_thread": False})
+pool_options = {
+  "pool_size": settings.DB_POOL_SIZE,
+  "max_overflow": settings.DB_MAX_OVERFLOW,
+  "pool_timeout": settings.DB_POOL_TIMEOUT,
+}
+
+engine = create_engine(settings.DATABASE_URL, connect_args={"check_same_thread": False}, **pool_options)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# Async engine for endpoints that run on the event loop
+async_engine = create_async_engine(settings.ASYNC_DATABASE_URL, **pool_options)
+AsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+
+def apply_sqlite_profile(dbapi_connection, connection_record):
+  """Apply the SQLite storage profile from settings to a new connection"""
+  cursor = dbapi_connection.cursor()
+  cursor.execute(f"PRAGMA journal_mode={settings.SQLITE_JOURNAL_MODE}")
+  cursor.execute(f"PRAGMA synchronous={settings.SQLITE_SYNCHRONOUS}")
+  cursor.execute(f"PRAGMA cache_size={int(settings.SQLITE_CACHE_SIZE)}")
+  cursor.execute(f"PRAGMA mmap_size={int(settings.SQLITE_MMAP_SIZE)}")
+  cursor.execute(f"PRAGMA busy_timeout={int(settings.SQLITE_BUSY_TIMEOUT)}")
+  cursor.close()
+
+if engine.dialect.name == "sqlite":
+  event.listen(engine, "connect", apply_sqlite_profile)
+if async_engine.dialect.name == "sqlite":
+  event.listen(async_engine.sync_engine, "connect", apply_sqlite_profile)
+
 # Dependency
 def get_db():
   db = SessionLocal()
@@ -12,3 +38,8 @@ def get_db():
     yield db
   finally:
     db.close()
+
+# Async dependency
+async def get_async_db():
+  async with AsyncSessionLocal() as db:
+    yield db
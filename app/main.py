@@ -1,12 +1,20 @@
 from fastapi import FastAPI
+from fastapi.responses import Response
 from fastapi.middleware.cors import CORSMiddleware
 import atexit
 from app.api import tracker
 from app.api import upload
 from app.core.config import settings
-from app.db.base import Base
-from app.db.session import engine
+from app.db import init_db
+from app.db.session import engine, async_engine
 from app.services.auto_seeder_service import auto_seeder_manager
+from app.services.swarm_registry import swarm_registry
+from app.services.peer_reaper import peer_reaper
+from app.services.tracker_stats import tracker_stats
+from app.services.hashing_pool import hashing_pool
+from app.services.udp_tracker import udp_tracker
+from app.services.torrent_cache import torrent_cache
+from app.services.metrics import metrics, MetricsMiddleware
 
 # Import models to ensure they are registered with SQLAlchemy
 from app.models import torrent, peer, user
@@ -25,16 +33,66 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["GET", "POST", "PUT", "DELETE", "OPTIONS"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor"],  # Torrent list pagination
 )
 
-# Create tables
-Base.metadata.create_all(bind=engine)
+# Count and time every request by route, and every database statement
+app.add_middleware(MetricsMiddleware)
+metrics.instrument_engine(engine)
+metrics.instrument_engine(async_engine.sync_engine)
+
+def service_metrics():
+    swarms, seeders, leechers, peers = swarm_registry.totals()
+    return [
+        ("tracker_swarms", "gauge", "Swarms loaded in memory", swarms),
+        ("tracker_seeders", "gauge", "Seeders across loaded swarms", seeders),
+        ("tracker_leechers", "gauge", "Leechers across loaded swarms", leechers),
+        ("tracker_peers", "gauge", "Peers tracked across loaded swarms", peers),
+        ("tracker_write_queue_depth", "gauge", "Swarm writes waiting for the database writer", swarm_registry.write_queue.qsize()),
+        ("tracker_writes_shed_total", "counter", "Swarm writes dropped because the write queue was full", swarm_registry.shed_writes),
+        ("tracker_torrent_cache_hits_total", "counter", "info_hash lookups answered by the torrent cache", torrent_cache.hits),
+        ("tracker_torrent_cache_misses_total", "counter", "info_hash lookups that went to the database", torrent_cache.misses),
+        ("seeder_active", "gauge", "P2P seeder servers running", len(auto_seeder_manager.seeders)),
+        ("seeder_bytes_served_total", "counter", "Piece bytes sent to peers by the seeder servers", auto_seeder_manager.bytes_served()),
+    ]
+
+metrics.register_collector(service_metrics)
+
+# Create tables and indexes
+init_db()
+
+# Start swarm registry database writer, expired peer reaper and stats refresher
+swarm_registry.start()
+peer_reaper.start()
+tracker_stats.start()
 
 # Start auto seeder manager
 auto_seeder_manager.start_manager()
 
 # Register cleanup on app shutdown
 atexit.register(auto_seeder_manager.stop_manager)
+atexit.register(swarm_registry.stop)
+atexit.register(peer_reaper.stop)
+atexit.register(tracker_stats.stop)
+atexit.register(hashing_pool.stop)
+
+@app.on_event("startup")
+async def start_udp_tracker():
+    # The UDP listener runs on the application event loop
+    if settings.UDP_TRACKER_ENABLED:
+        try:
+            await udp_tracker.start()
+        except OSError as e:
+            print(f"Warning: Failed to start UDP tracker: {e}")
+
+@app.on_event("shutdown")
+async def stop_udp_tracker():
+    udp_tracker.stop()
+
+@app.on_event("shutdown")
+async def close_async_engine():
+    # aiosqlite connections run on worker threads that must be closed
+    await async_engine.dispose()
 
 # Load routers
 app.include_router(tracker.router, prefix="/api/tracker", tags=["Tracker"])
@@ -50,3 +108,8 @@ def read_root():
 @app.get("/health")
 def health_check():
     return {"status": "healthy"}
+
+@app.get("/metrics")
+def get_metrics():
+    """Prometheus scrape endpoint"""
+    return Response(metrics.render(), media_type="text/plain; version=0.0.4; charset=utf-8")
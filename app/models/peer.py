@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, DateTime, Boolean, ForeignKey
+from sqlalchemy import Column, Integer, String, DateTime, Boolean, ForeignKey, Index, UniqueConstraint
 from sqlalchemy.sql import func
 from sqlalchemy.orm import relationship
 from app.db.base import Base
@@ -7,7 +7,7 @@ class Peer(Base):
     __tablename__ = "peers"
     
     id = Column(Integer, primary_key=True, index=True)
-    peer_id = Column(String(20), unique=True, index=True)  # Unique peer identifier
+    peer_id = Column(String(20), index=True)  # Peer identifier, unique within a torrent
     ip_address = Column(String(15), index=True)  # IPv4 address
     port = Column(Integer, index=True)
     torrent_id = Column(Integer, ForeignKey("torrents.id"))
@@ -20,5 +20,17 @@ class Peer(Base):
     # Relationship to torrent
     torrent = relationship("Torrent", back_populates="peers")
     
+    __table_args__ = (
+        # A peer is identified per swarm, and one ip:port joins a swarm only once
+        UniqueConstraint("torrent_id", "peer_id", name="uq_peers_torrent_id_peer_id"),
+        UniqueConstraint("torrent_id", "ip_address", "port", name="uq_peers_torrent_id_endpoint"),
+        # Active peers of a torrent (swarm load, get_peers)
+        Index("ix_peers_torrent_id_last_announce", "torrent_id", "last_announce"),
+        # Seeder/leecher counts per torrent
+        Index("ix_peers_torrent_id_is_seeder_last_announce", "torrent_id", "is_seeder", "last_announce"),
+        # Expired peer sweeps and active peer stats
+        Index("ix_peers_last_announce", "last_announce"),
+    )
+    
     def __repr__(self):
         return f"<Peer(peer_id='{self.peer_id}', ip='{self.ip_address}', port={self.port})>"
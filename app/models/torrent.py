@@ -1,6 +1,6 @@
-from sqlalchemy import Column, Integer, String, DateTime, LargeBinary, Float
+from sqlalchemy import Column, Integer, String, DateTime, LargeBinary, Float, Index
 from sqlalchemy.sql import func
-from sqlalchemy.orm import relationship
+from sqlalchemy.orm import relationship, deferred
 from app.db.base import Base
 
 class Torrent(Base):
@@ -12,7 +12,13 @@ class Torrent(Base):
     file_size = Column(Integer)  # Size in bytes
     piece_length = Column(Integer)  # Size of each piece in bytes
     num_pieces = Column(Integer)  # Total number of pieces
-    pieces_hash = Column(LargeBinary)  # Concatenated SHA-1 hashes of all pieces
+    # Concatenated SHA-1 hashes of all pieces, megabytes for large files, so only
+    # loaded when accessed (or with undefer) instead of with every torrent query
+    pieces_hash = deferred(Column(LargeBinary))
+    # Serialized .torrent file and its strong ETag (SHA-1 of those bytes), so downloads
+    # are served from the row instead of the torrents/ directory
+    torrent_file = deferred(Column(LargeBinary))
+    torrent_etag = Column(String(40))
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     seeders = Column(Integer, default=0)
     leechers = Column(Integer, default=0)
@@ -21,5 +27,11 @@ class Torrent(Base):
     # Relationship to peers
     peers = relationship("Peer", back_populates="torrent")
     
+    __table_args__ = (
+        # Keyset pagination of the torrent list by seeders, id breaks ties
+        # (by name uses the name index, SQLite keys every index on the rowid too)
+        Index("ix_torrents_seeders_id", "seeders", "id"),
+    )
+    
     def __repr__(self):
         return f"<Torrent(name='{self.name}', info_hash='{self.info_hash}')>"
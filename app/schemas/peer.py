@@ -14,7 +14,7 @@ class PeerCreate(PeerBase):
     left: int = 0
 
 class PeerResponse(PeerBase):
-    id: int
+    id: Optional[int] = None  # None until the swarm registry has written the peer
     torrent_id: int
     uploaded: int
     downloaded: int
@@ -28,3 +28,9 @@ class PeerResponse(PeerBase):
 class PeerListResponse(BaseModel):
     peers: list[PeerResponse]
     interval: int = 1800  # Announce interval in seconds (30 minutes)
+    min_interval: int = 300  # Announces sooner than this are answered from cache
+
+class CompactPeerListResponse(BaseModel):
+    peers: str  # Base64 of packed 6-byte entries (4-byte IPv4 + 2-byte port, network order)
+    interval: int = 1800
+    min_interval: int = 300
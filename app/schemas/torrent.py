@@ -1,5 +1,5 @@
 from pydantic import BaseModel
-from typing import Optional
+from typing import Dict, List, Optional
 from datetime import datetime
 
 class TorrentBase(BaseModel):
@@ -33,3 +33,25 @@ class TorrentAnnounceRequest(BaseModel):
     downloaded: int = 0
     left: int = 0
     event: Optional[str] = None  # 'started', 'stopped', 'completed'
+    compact: int = 0  # 1 to receive peers as packed 6-byte IPv4+port entries
+    numwant: Optional[int] = None  # Number of peers wanted, capped by the server
+
+class BatchAnnounceRequest(BaseModel):
+    announces: List[TorrentAnnounceRequest]
+
+class BatchAnnounceResponse(BaseModel):
+    accepted: int  # Announces applied
+    failed: Dict[str, str] = {}  # Info hash -> reason, for announces that were rejected
+    interval: int = 1800
+    min_interval: int = 300
+
+class ScrapeRequest(BaseModel):
+    info_hashes: List[str]
+
+class ScrapeStats(BaseModel):
+    complete: int  # Seeders
+    incomplete: int  # Leechers
+    downloaded: int  # Completed downloads
+
+class ScrapeResponse(BaseModel):
+    files: Dict[str, ScrapeStats]  # Keyed by info hash, unknown hashes are omitted
@@ -12,8 +12,11 @@ from pathlib import Path
 
 from app.utils.torrent_generator import TorrentGenerator
 from app.utils.bittorrent import BitTorrentUtils
+from app.utils.content_store import content_store
 from scripts.p2p_seeder_server import P2PSeederServer
 
+REGISTRATION_BATCH_SIZE = 1000  # Seeders announced per batch request
+
 class AutoSeederManager:
     """Manages automatic P2P seeder servers"""
     
@@ -22,6 +25,9 @@ class AutoSeederManager:
         self.base_port = 6881
         self.next_port = self.base_port
         self.running = False
+        self.pending_registrations: List[tuple] = []  # (info_hash, port, file_size) awaiting announce
+        self.registration_lock = threading.Lock()
+        self.registration_thread = None
         
     def start_manager(self):
         """Start the auto seeder manager"""
@@ -37,7 +43,7 @@ class AutoSeederManager:
         """Start seeder servers for existing torrent files"""
         try:
             torrents_dir = "torrents"
-            uploads_dir = "uploads"
+            uploads_dir = content_store.root
             
             if not os.path.exists(torrents_dir) or not os.path.exists(uploads_dir):
                 return
@@ -49,10 +55,9 @@ class AutoSeederManager:
                 
                 try:
                     torrent_data = TorrentGenerator.load_torrent_file(torrent_path)
-                    original_filename = torrent_data['info']['name']
-                    original_file_path = os.path.join(uploads_dir, original_filename)
+                    original_file_path = content_store.find_for_info(torrent_data['info'])
                     
-                    if os.path.exists(original_file_path):
+                    if original_file_path:
                         self.add_seeder(torrent_path, original_file_path)
                         time.sleep(0.2)  # Small delay between server starts
                         
@@ -113,60 +118,72 @@ class AutoSeederManager:
         return port
     
     def _register_with_tracker_async(self, info_hash: str, port: int, torrent_data: dict):
-        """Register seeder with tracker in background"""
-        def register():
+        """Queue a seeder for registration, seeders started together share one batch announce"""
+        with self.registration_lock:
+            self.pending_registrations.append((info_hash, port, torrent_data['info']['length']))
+            if self.registration_thread is None:
+                self.registration_thread = threading.Thread(target=self._register_pending, daemon=True)
+                self.registration_thread.start()
+    
+    def _register_pending(self):
+        """Register queued seeders with the tracker until the queue stays empty"""
+        import requests
+        import socket
+        
+        # Get the actual network IP instead of using localhost
+        def get_local_ip():
+            """Get the local network IP address"""
             try:
-                import requests
-                import socket
-                
-                time.sleep(1)  # Wait for server to fully start
-                
-                # Get the actual network IP instead of using localhost
-                def get_local_ip():
-                    """Get the local network IP address"""
-                    try:
-                        # Connect to a remote address to determine local IP
-                        with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as s:
-                            s.connect(("8.8.8.8", 80))
-                            return s.getsockname()[0]
-                    except:
-                        return "127.0.0.1"
-                
-                local_ip = get_local_ip()
-                
+                # Connect to a remote address to determine local IP
+                with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as s:
+                    s.connect(("8.8.8.8", 80))
+                    return s.getsockname()[0]
+            except:
+                return "127.0.0.1"
+        
+        local_ip = get_local_ip()
+        
+        while True:
+            time.sleep(1)  # Wait for servers to fully start and more seeders to queue
+            
+            with self.registration_lock:
+                pending, self.pending_registrations = self.pending_registrations, []
+                if not pending:
+                    self.registration_thread = None
+                    return
+            
+            announces = [{
+                'info_hash': info_hash,
                 # Use consistent peer ID generation (same as other components)
-                peer_id = BitTorrentUtils.generate_peer_id("P2PS", info_hash, local_ip)
-                
-                file_size = torrent_data['info']['length']
-                
-                announce_params = {
-                    'info_hash': info_hash,
-                    'peer_id': peer_id,
-                    'port': port,
-                    'uploaded': file_size,
-                    'downloaded': file_size,
-                    'left': 0,
-                    'event': 'completed',
-                    'compact': 0,
-                    'ip': local_ip  # Explicitly specify the IP address
-                }
-                
-                # Use localhost to connect to tracker but specify network IP
-                response = requests.get(
-                    "http://localhost:8000/api/tracker/announce",
-                    params=announce_params,
-                    timeout=5
-                )
-                
-                if response.status_code == 200:
-                    print(f"✅ Registered seeder for port {port} with tracker (IP: {local_ip})")
-                else:
-                    print(f"⚠️  Failed to register seeder with tracker: {response.text}")
+                'peer_id': BitTorrentUtils.generate_peer_id("P2PS", info_hash, local_ip),
+                'port': port,
+                'uploaded': file_size,
+                'downloaded': file_size,
+                'left': 0,
+                'event': 'completed',
+                'ip': local_ip  # Explicitly specify the IP address
+            } for info_hash, port, file_size in pending]
+            
+            for start in range(0, len(announces), REGISTRATION_BATCH_SIZE):
+                chunk = announces[start:start + REGISTRATION_BATCH_SIZE]
+                try:
+                    # Use localhost to connect to tracker but specify network IP
+                    response = requests.post(
+                        "http://localhost:8000/api/tracker/announce/batch",
+                        json={'announces': chunk},
+                        timeout=30
+                    )
                     
-            except Exception as e:
-                print(f"⚠️  Failed to register seeder with tracker: {e}")
-        
-        threading.Thread(target=register, daemon=True).start()
+                    if response.status_code == 200:
+                        result = response.json()
+                        print(f"✅ Registered {result['accepted']} seeders with tracker (IP: {local_ip})")
+                        for info_hash, reason in result['failed'].items():
+                            print(f"⚠️  Failed to register seeder for {info_hash[:8]}: {reason}")
+                    else:
+                        print(f"⚠️  Failed to register seeders with tracker: {response.text}")
+                        
+                except Exception as e:
+                    print(f"⚠️  Failed to register seeders with tracker: {e}")
     
     def stop_manager(self):
         """Stop the auto seeder manager and all seeders"""
@@ -179,6 +196,10 @@ class AutoSeederManager:
         self.seeders.clear()
         print("🛑 Auto Seeder Manager stopped")
     
+    def bytes_served(self) -> int:
+        """Total piece bytes sent to peers by all running seeders"""
+        return sum(seeder_info['server'].bytes_served for seeder_info in list(self.seeders.values()))
+    
     def get_seeder_info(self) -> List[dict]:
         """Get information about running seeders"""
         info = []
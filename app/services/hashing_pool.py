@@ -0,0 +1,139 @@
+"""
+Hashing Pool
+Runs torrent hashing and metadata generation on a bounded worker pool so the
+event loop keeps serving announces, and tracks each upload as a pollable job
+"""
+
+import asyncio
+import threading
+import uuid
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from datetime import datetime
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from fastapi import HTTPException
+
+from app.core.config import settings
+
+class HashingPool:
+    """Bounded pool of hashing workers with a bounded backlog of upload jobs
+
+    A job holds its slot from creation until it finishes or fails, so uploads are
+    admitted before their bytes are copied and hashed, not after.
+    """
+
+    def __init__(self):
+        self.executor: Optional[ThreadPoolExecutor] = None
+        # Receiving, queued and running jobs; uploads beyond this are turned away
+        self.slots = threading.BoundedSemaphore(settings.HASH_WORKERS + settings.HASH_QUEUE_SIZE)
+        # Regeneration jobs on top of their slot, so they never occupy every worker
+        self.regeneration_slots = threading.BoundedSemaphore(settings.HASH_REGENERATION_JOBS)
+        self.jobs: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()  # job_id -> job, oldest first
+        self.held: Dict[str, Tuple[threading.BoundedSemaphore, ...]] = {}  # job_id -> slots it holds
+        self.lock = threading.Lock()
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        with self.lock:
+            if self.executor is None:
+                self.executor = ThreadPoolExecutor(
+                    max_workers=settings.HASH_WORKERS, thread_name_prefix="hashing"
+                )
+            return self.executor
+
+    def create_job(self, filename: str, regeneration: bool = False) -> str:
+        """Admit an upload whose bytes are still being received, 503 when the backlog is full"""
+        held = self._acquire(self.slots, self.regeneration_slots) if regeneration else self._acquire(self.slots)
+        job_id = str(uuid.uuid4())
+        with self.lock:
+            self.held[job_id] = held
+            self.jobs[job_id] = {
+                'job_id': job_id,
+                'filename': filename,
+                'status': 'receiving',
+                'created_at': datetime.utcnow(),
+                'finished_at': None,
+                'result': None,
+                'error': None
+            }
+            # Forget the oldest jobs once the history is full
+            while len(self.jobs) > settings.UPLOAD_JOB_HISTORY:
+                self.jobs.popitem(last=False)
+        return job_id
+
+    def submit(self, job_id: str, fn: Callable, *args) -> Future:
+        """Queue the processing step of a job, which releases its slot when done"""
+        self._check_admitted(job_id)
+        self._update(job_id, status='queued')
+
+        def run():
+            self._update(job_id, status='hashing')
+            try:
+                result = fn(*args)
+            except Exception as e:
+                detail = e.detail if isinstance(e, HTTPException) else str(e)
+                self._update(job_id, status='failed', error=detail, finished_at=datetime.utcnow())
+                raise
+            finally:
+                self._release(job_id)
+            self._update(job_id, status='completed', result=result, finished_at=datetime.utcnow())
+            return result
+
+        return self._get_executor().submit(run)
+
+    async def run(self, job_id: str, fn: Callable, *args) -> Any:
+        """Run a short blocking call of an admitted job (e.g. hashing one upload chunk) on the pool"""
+        self._check_admitted(job_id)
+        return await asyncio.wrap_future(self._get_executor().submit(fn, *args))
+
+    def get_job(self, job_id: str) -> Optional[Dict[str, Any]]:
+        with self.lock:
+            job = self.jobs.get(job_id)
+            return dict(job) if job is not None else None
+
+    def fail_job(self, job_id: str, error: str):
+        """Mark a job failed before it reached the pool, freeing its slot"""
+        self._update(job_id, status='failed', error=error, finished_at=datetime.utcnow())
+        self._release(job_id)
+
+    def stop(self):
+        """Stop accepting work, letting running jobs finish"""
+        with self.lock:
+            executor, self.executor = self.executor, None
+        if executor is not None:
+            executor.shutdown(wait=False)
+
+    @staticmethod
+    def _acquire(*semaphores: threading.BoundedSemaphore) -> Tuple[threading.BoundedSemaphore, ...]:
+        acquired = []
+        for semaphore in semaphores:
+            if not semaphore.acquire(blocking=False):
+                for held in acquired:
+                    held.release()
+                raise HTTPException(
+                    status_code=503,
+                    detail="Too many uploads being processed, retry later",
+                    headers={"Retry-After": "5"}
+                )
+            acquired.append(semaphore)
+        return tuple(acquired)
+
+    def _check_admitted(self, job_id: str):
+        with self.lock:
+            if job_id not in self.held:
+                raise RuntimeError(f"Upload job {job_id} holds no hashing slot")
+
+    def _release(self, job_id: str):
+        with self.lock:
+            held = self.held.pop(job_id, ())
+        for semaphore in held:
+            semaphore.release()
+
+    def _update(self, job_id: str, **fields):
+        with self.lock:
+            job = self.jobs.get(job_id)
+            if job is not None:
+                job.update(fields)
+
+# Global instance
+hashing_pool = HashingPool()
@@ -0,0 +1,173 @@
+"""
+Metrics
+Request counts and latency histograms per route, database query timings and
+swarm/seeder gauges, exposed in the Prometheus text format
+"""
+
+import re
+import threading
+import time
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+# Seconds; requests and queries slower than the last bucket only show in +Inf
+REQUEST_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0)
+
+# Table a statement works on, e.g. "SELECT ... FROM torrents" or "INSERT INTO peers"
+TABLE_PATTERN = re.compile(r'\b(?:FROM|INTO|UPDATE)\s+"?(\w+)', re.IGNORECASE)
+
+class Histogram:
+    """Cumulative latency histogram with Prometheus bucket semantics"""
+
+    def __init__(self, buckets: Tuple[float, ...]):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)  # Observations per bucket, not cumulative
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value: float):
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[i] += 1
+                break
+        self.count += 1
+        self.sum += value
+
+    def samples(self, name: str, labels: Dict[str, str]) -> List[str]:
+        lines = []
+        cumulative = 0
+        for bound, count in zip(self.buckets, self.counts):
+            cumulative += count
+            lines.append(f"{name}_bucket{_labels(dict(labels, le=repr(bound)))} {cumulative}")
+        lines.append(f"{name}_bucket{_labels(dict(labels, le='+Inf'))} {self.count}")
+        lines.append(f"{name}_sum{_labels(labels)} {self.sum}")
+        lines.append(f"{name}_count{_labels(labels)} {self.count}")
+        return lines
+
+def _labels(labels: Dict[str, str]) -> str:
+    if not labels:
+        return ""
+    pairs = []
+    for key, value in labels.items():
+        value = str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+        pairs.append(f'{key}="{value}"')
+    return "{" + ",".join(pairs) + "}"
+
+# (name, type, help, value) samples contributed by a collector at scrape time
+GaugeSample = Tuple[str, str, str, float]
+
+class Metrics:
+    """Process-wide metrics registry"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.requests: Dict[Tuple[str, str, str], int] = {}  # (method, route, status) -> count
+        self.request_latency: Dict[Tuple[str, str], Histogram] = {}  # (method, route) -> seconds
+        self.query_latency: Dict[Tuple[str, str], Histogram] = {}  # (operation, table) -> seconds
+        self.collectors: List[Callable[[], Iterable[GaugeSample]]] = []
+
+    def observe_request(self, method: str, route: str, status: int, seconds: float):
+        with self.lock:
+            key = (method, route, str(status))
+            self.requests[key] = self.requests.get(key, 0) + 1
+            histogram = self.request_latency.get((method, route))
+            if histogram is None:
+                histogram = self.request_latency[(method, route)] = Histogram(REQUEST_BUCKETS)
+            histogram.observe(seconds)
+
+    def observe_query(self, statement: str, seconds: float):
+        operation = statement.lstrip().split(None, 1)[0].upper() if statement.strip() else ""
+        match = TABLE_PATTERN.search(statement)
+        table = match.group(1) if match else ""
+        with self.lock:
+            histogram = self.query_latency.get((operation, table))
+            if histogram is None:
+                histogram = self.query_latency[(operation, table)] = Histogram(QUERY_BUCKETS)
+            histogram.observe(seconds)
+
+    def instrument_engine(self, engine: Engine):
+        """Time every statement executed on a (sync) engine
+        
+        The start time lives on the statement's execution context, so a statement
+        that raises leaves nothing behind on the connection.
+        """
+        @event.listens_for(engine, "before_cursor_execute")
+        def start_timer(conn, cursor, statement, parameters, context, executemany):
+            if context is not None:
+                context._query_started_at = time.perf_counter()
+
+        @event.listens_for(engine, "after_cursor_execute")
+        def stop_timer(conn, cursor, statement, parameters, context, executemany):
+            started = getattr(context, "_query_started_at", None)
+            if started is not None:
+                self.observe_query(statement, time.perf_counter() - started)
+
+    def register_collector(self, collector: Callable[[], Iterable[GaugeSample]]):
+        """Add a callable returning (name, type, help, value) samples read at scrape time"""
+        self.collectors.append(collector)
+
+    def render(self) -> str:
+        """All metrics in the Prometheus text exposition format"""
+        lines = []
+        with self.lock:
+            lines.append("# HELP tracker_http_requests_total HTTP requests handled, by route and status")
+            lines.append("# TYPE tracker_http_requests_total counter")
+            for (method, route, status), count in sorted(self.requests.items()):
+                lines.append(f"tracker_http_requests_total{_labels({'method': method, 'route': route, 'status': status})} {count}")
+
+            lines.append("# HELP tracker_http_request_duration_seconds HTTP request latency, by route")
+            lines.append("# TYPE tracker_http_request_duration_seconds histogram")
+            for (method, route), histogram in sorted(self.request_latency.items()):
+                lines.extend(histogram.samples("tracker_http_request_duration_seconds", {'method': method, 'route': route}))
+
+            lines.append("# HELP tracker_db_query_duration_seconds Database statement latency, by statement type and table")
+            lines.append("# TYPE tracker_db_query_duration_seconds histogram")
+            for (operation, table), histogram in sorted(self.query_latency.items()):
+                lines.extend(histogram.samples("tracker_db_query_duration_seconds", {'operation': operation, 'table': table}))
+
+        for collector in self.collectors:
+            for name, kind, help_text, value in collector():
+                lines.append(f"# HELP {name} {help_text}")
+                lines.append(f"# TYPE {name} {kind}")
+                lines.append(f"{name} {value}")
+
+        return "\n".join(lines) + "\n"
+
+class MetricsMiddleware:
+    """ASGI middleware recording the count and latency of every HTTP request by route"""
+
+    def __init__(self, app, registry: Optional[Metrics] = None):
+        self.app = app
+        self.registry = registry or metrics
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status = 500
+        started = time.perf_counter()
+
+        async def send_with_status(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            # The router stores the matched route in the scope; label by its template, not the raw path
+            route = scope.get("route")
+            self.registry.observe_request(
+                scope["method"],
+                getattr(route, "path", "unmatched"),
+                status,
+                time.perf_counter() - started
+            )
+
+# Global instance
+metrics = Metrics()
@@ -0,0 +1,87 @@
+"""
+Peer Reaper
+Deletes peers that stopped announcing, in bounded batches
+"""
+
+import threading
+from datetime import datetime
+from typing import Optional
+
+from app.core.config import settings
+from app.db.session import SessionLocal
+from app.models.peer import Peer
+from app.services.swarm_registry import swarm_registry, PEER_TIMEOUT
+
+class PeerReaper:
+    """Periodically removes expired peers from the database"""
+
+    def __init__(self):
+        self.thread: Optional[threading.Thread] = None
+        self.stop_event = threading.Event()
+        self.running = False
+
+    def start(self):
+        """Start the background reaper"""
+        if self.running:
+            return
+        self.running = True
+        self.stop_event.clear()
+        self.thread = threading.Thread(target=self._reap_loop, daemon=True)
+        self.thread.start()
+        print("🧹 Peer reaper started")
+
+    def stop(self):
+        """Stop the background reaper"""
+        if not self.running:
+            return
+        self.running = False
+        self.stop_event.set()
+        if self.thread:
+            self.thread.join(timeout=5)
+        print("🛑 Peer reaper stopped")
+
+    def reap(self, batch_size: Optional[int] = None) -> int:
+        """Delete expired peers batch by batch and return how many were removed"""
+        batch_size = batch_size or settings.PEER_REAPER_BATCH_SIZE
+        cutoff = datetime.utcnow() - PEER_TIMEOUT
+        total = 0
+
+        while True:
+            db = SessionLocal()
+            try:
+                rows = db.query(Peer.id, Peer.torrent_id).filter(
+                    Peer.last_announce <= cutoff
+                ).limit(batch_size).all()
+                if not rows:
+                    break
+
+                db.query(Peer).filter(Peer.id.in_([row.id for row in rows])).delete(
+                    synchronize_session=False
+                )
+                db.commit()
+            except Exception as e:
+                db.rollback()
+                print(f"⚠️  Peer reaper batch failed: {e}")
+                break
+            finally:
+                db.close()
+
+            total += len(rows)
+
+            # Keep swarm counters in step with the rows just removed
+            swarm_registry.reconcile({row.torrent_id for row in rows})
+
+            if len(rows) < batch_size or self.stop_event.is_set():
+                break
+
+        return total
+
+    def _reap_loop(self):
+        """Run the reaper periodically until stopped"""
+        while not self.stop_event.wait(settings.PEER_REAPER_INTERVAL):
+            removed = self.reap()
+            if removed:
+                print(f"🧹 Reaped {removed} expired peers")
+
+# Global instance
+peer_reaper = PeerReaper()
@@ -0,0 +1,762 @@
+"""
+In-memory Swarm Registry
+Answers announces from memory and writes peer state through to the database
+in a background thread
+"""
+
+import asyncio
+import heapq
+import logging
+import queue
+import random
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Set, Tuple
+
+from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import and_, func, select
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+
+from app.core.config import settings
+from app.db.session import SessionLocal
+from app.models.torrent import Torrent
+from app.models.peer import Peer
+from app.schemas.torrent import TorrentResponse
+from app.services.torrent_cache import torrent_cache
+from app.utils.locality import locality_key
+
+logger = logging.getLogger(__name__)
+
+PEER_TIMEOUT = timedelta(hours=2)  # Peers that have not announced for this long are inactive
+REMOTE_PROBES_PER_PEER = 4  # Entries a remote draw may look at per peer wanted before it settles for fewer
+REMOTE_MIN_PROBES = 64  # Small swarms are always scanned in full
+
+class SwarmPeer:
+    """A peer as tracked in memory"""
+
+    __slots__ = ('id', 'peer_id', 'ip_address', 'port', 'torrent_id', 'uploaded',
+                 'downloaded', 'left', 'is_seeder', 'last_announce',
+                 'tokens', 'refilled_at', 'last_sample', 'locality')
+
+    def __init__(self, peer_id: str, ip_address: str, port: int, torrent_id: int,
+                 uploaded: int = 0, downloaded: int = 0, left: int = 0,
+                 last_announce: Optional[datetime] = None, id: Optional[int] = None):
+        self.id = id  # Database row id, set once the peer has been written
+        self.peer_id = peer_id
+        self.ip_address = ip_address
+        self.port = port
+        self.torrent_id = torrent_id
+        self.uploaded = uploaded
+        self.downloaded = downloaded
+        self.left = left
+        self.is_seeder = left == 0
+        self.last_announce = last_announce or datetime.utcnow()
+        self.tokens = float(settings.ANNOUNCE_BURST)  # Announce token bucket, starts full
+        self.refilled_at = time.monotonic()
+        self.last_sample: List["SwarmPeer"] = []  # Peers returned by the last applied announce
+        self.locality: Optional[str] = None  # Locality group, set when the peer joins a swarm
+
+    def take_token(self) -> bool:
+        """Refill the announce bucket and spend one token, False when it is empty"""
+        if settings.ANNOUNCE_MIN_INTERVAL <= 0:
+            return True
+        now = time.monotonic()
+        refill = (now - self.refilled_at) / settings.ANNOUNCE_MIN_INTERVAL
+        self.tokens = min(float(settings.ANNOUNCE_BURST), self.tokens + refill)
+        self.refilled_at = now
+        if self.tokens < 1:
+            return False
+        self.tokens -= 1
+        return True
+
+    @classmethod
+    def from_model(cls, peer: Peer) -> "SwarmPeer":
+        return cls(
+            peer_id=peer.peer_id,
+            ip_address=peer.ip_address,
+            port=peer.port,
+            torrent_id=peer.torrent_id,
+            uploaded=peer.uploaded or 0,
+            downloaded=peer.downloaded or 0,
+            left=peer.left or 0,
+            last_announce=peer.last_announce,
+            id=peer.id
+        )
+
+    def snapshot(self) -> dict:
+        """Copy of the peer state for the database writer"""
+        return {
+            'peer_id': self.peer_id,
+            'ip_address': self.ip_address,
+            'port': self.port,
+            'torrent_id': self.torrent_id,
+            'uploaded': self.uploaded,
+            'downloaded': self.downloaded,
+            'left': self.left,
+            'is_seeder': self.is_seeder,
+            'last_announce': self.last_announce
+        }
+
+class PeerArray:
+    """Dense array of peers with O(1) add, remove and uniform sampling"""
+
+    __slots__ = ('peers', 'positions')
+
+    def __init__(self):
+        self.peers: List[SwarmPeer] = []
+        self.positions: Dict[str, int] = {}  # peer_id -> position in peers
+
+    def __len__(self) -> int:
+        return len(self.peers)
+
+    def add(self, peer: SwarmPeer):
+        self.positions[peer.peer_id] = len(self.peers)
+        self.peers.append(peer)
+
+    def remove(self, peer: SwarmPeer):
+        """Remove a peer, swapping the last entry into its slot"""
+        position = self.positions.pop(peer.peer_id)
+        last = self.peers.pop()
+        if last is not peer:
+            self.peers[position] = last
+            self.positions[last.peer_id] = position
+
+    def sample(self, count: int, exclude: Set[str], skip_locality: Optional[str] = None) -> List[SwarmPeer]:
+        """Uniform random sample of active peers without replacement, optionally outside one locality group
+        
+        Runs a lazy Fisher-Yates shuffle over the array, so the cost is proportional
+        to the number of peers drawn rather than the swarm size. Skipping a locality
+        group stops after REMOTE_PROBES_PER_PEER entries per peer wanted (at least
+        REMOTE_MIN_PROBES), so a swarm
+        made mostly of that group returns a short sample instead of a full scan.
+        """
+        cutoff = datetime.utcnow() - PEER_TIMEOUT
+        size = len(self.peers)
+        probes = size
+        if skip_locality is not None:
+            probes = min(size, max(count * REMOTE_PROBES_PER_PEER, REMOTE_MIN_PROBES))
+        swapped: Dict[int, int] = {}  # Positions displaced by the partial shuffle
+        sample = []
+        for i in range(probes):
+            if len(sample) >= count:
+                break
+            j = random.randrange(i, size)
+            picked = swapped.get(j, j)
+            swapped[j] = swapped.get(i, i)
+            peer = self.peers[picked]
+            if peer.peer_id not in exclude and peer.last_announce > cutoff and \
+                    (skip_locality is None or peer.locality != skip_locality):
+                sample.append(peer)
+        return sample
+
+NO_PEERS = PeerArray()  # Stands in for locality groups without peers
+
+class Swarm:
+    """All peers of a single torrent, keyed by peer_id"""
+
+    def __init__(self, torrent_id: int, info_hash: str, completed: int = 0):
+        self.torrent_id = torrent_id
+        self.info_hash = info_hash
+        self.completed = completed
+        self.peers: Dict[str, SwarmPeer] = {}
+        # Same peers as dense arrays per role, for O(1) sampling of either
+        self.seeder_list = PeerArray()
+        self.leecher_list = PeerArray()
+        self.local_peers: Dict[Tuple[str, bool], PeerArray] = {}  # (locality, is_seeder) -> peers
+        self.endpoints: Dict[Tuple[str, int], str] = {}  # (ip, port) -> peer_id
+        self.seeders = 0  # Maintained incrementally on every state transition
+        self.leechers = 0
+        self.lock = threading.Lock()
+
+    def add_peer(self, peer: SwarmPeer):
+        self.peers[peer.peer_id] = peer
+        peer.locality = locality_key(peer.ip_address)
+        self._add_to_role(peer)
+        self.endpoints[(peer.ip_address, peer.port)] = peer.peer_id
+        if peer.is_seeder:
+            self.seeders += 1
+        else:
+            self.leechers += 1
+
+    def move_peer(self, peer: SwarmPeer, ip_address: str, port: int):
+        """Change the endpoint of a peer"""
+        if self.endpoints.get((peer.ip_address, peer.port)) == peer.peer_id:
+            del self.endpoints[(peer.ip_address, peer.port)]
+        self._remove_from_role(peer)
+        peer.ip_address = ip_address
+        peer.port = port
+        peer.locality = locality_key(ip_address)
+        self._add_to_role(peer)
+        self.endpoints[(ip_address, port)] = peer.peer_id
+
+    def set_seeder(self, peer: SwarmPeer, is_seeder: bool):
+        """Move a peer between the seeder and leecher counts"""
+        if peer.is_seeder == is_seeder:
+            return
+        self._remove_from_role(peer)
+        peer.is_seeder = is_seeder
+        self._add_to_role(peer)
+        if is_seeder:
+            self.seeders += 1
+            self.leechers -= 1
+        else:
+            self.seeders -= 1
+            self.leechers += 1
+
+    def remove_peer(self, peer_id: str) -> Optional[SwarmPeer]:
+        """Remove a peer and its endpoint, returning it if it was in the swarm"""
+        peer = self.peers.pop(peer_id, None)
+        if peer is None:
+            return None
+        self._remove_from_role(peer)
+        if self.endpoints.get((peer.ip_address, peer.port)) == peer_id:
+            del self.endpoints[(peer.ip_address, peer.port)]
+        if peer.is_seeder:
+            self.seeders -= 1
+        else:
+            self.leechers -= 1
+        return peer
+
+    def _add_to_role(self, peer: SwarmPeer):
+        """Index a peer by role, and by role within its locality group"""
+        (self.seeder_list if peer.is_seeder else self.leecher_list).add(peer)
+        if peer.locality is not None:
+            key = (peer.locality, peer.is_seeder)
+            group = self.local_peers.get(key)
+            if group is None:
+                group = self.local_peers[key] = PeerArray()
+            group.add(peer)
+
+    def _remove_from_role(self, peer: SwarmPeer):
+        (self.seeder_list if peer.is_seeder else self.leecher_list).remove(peer)
+        if peer.locality is not None:
+            key = (peer.locality, peer.is_seeder)
+            group = self.local_peers[key]
+            group.remove(peer)
+            if not group:
+                del self.local_peers[key]
+
+    def expire_peers(self) -> List[SwarmPeer]:
+        """Remove peers that have not announced within the peer timeout"""
+        cutoff = datetime.utcnow() - PEER_TIMEOUT
+        expired = [p for p in self.peers.values() if p.last_announce <= cutoff]
+        for peer in expired:
+            self.remove_peer(peer.peer_id)
+        return expired
+
+    def recount(self) -> bool:
+        """Recompute seeder/leecher counts from the peers, returning True on drift"""
+        seeders = sum(1 for p in self.peers.values() if p.is_seeder)
+        leechers = len(self.peers) - seeders
+        drifted = (seeders, leechers) != (self.seeders, self.leechers)
+        self.seeders = seeders
+        self.leechers = leechers
+        return drifted
+
+    def select_peers(self, count: int, is_seeder: bool, exclude_peer_id: Optional[str] = None,
+                     locality: Optional[str] = None) -> List[SwarmPeer]:
+        """Peers worth connecting to for a seeder or a leecher, nearby peers first
+        
+        With a locality group, peers from the same group fill the list first, leaving
+        PEER_LOCALITY_REMOTE_SHARE of it to peers outside the group. Remote peers top up
+        when there are too few nearby peers, and nearby peers when there are too few
+        remote ones.
+        """
+        if count <= 0:
+            return []
+        exclude = {exclude_peer_id}
+        if locality is None:
+            return self._select_by_role(self.seeder_list, self.leecher_list, count, is_seeder, exclude)
+
+        local_seeders = self.local_peers.get((locality, True), NO_PEERS)
+        local_leechers = self.local_peers.get((locality, False), NO_PEERS)
+        local_count = count - round(count * settings.PEER_LOCALITY_REMOTE_SHARE)
+        selected = self._select_by_role(local_seeders, local_leechers, local_count, is_seeder, exclude)
+        exclude.update(peer.peer_id for peer in selected)
+        remote = self._select_by_role(
+            self.seeder_list, self.leecher_list, count - len(selected), is_seeder, exclude, skip_locality=locality
+        )
+        selected.extend(remote)
+        if len(selected) < count:
+            exclude.update(peer.peer_id for peer in remote)
+            selected.extend(self._select_by_role(
+                local_seeders, local_leechers, count - len(selected), is_seeder, exclude
+            ))
+        return selected
+
+    @staticmethod
+    def _select_by_role(seeder_list: PeerArray, leecher_list: PeerArray, count: int,
+                        is_seeder: bool, exclude: Set[str], skip_locality: Optional[str] = None) -> List[SwarmPeer]:
+        """Seeders only get leechers, they have nothing to download. Leechers get up to
+        PEER_SELECTION_SEEDER_SHARE of the list in seeders and the rest in the most
+        complete leechers of an oversampled draw; each side tops up the other when short.
+        """
+        if count <= 0:
+            return []
+        if is_seeder:
+            return leecher_list.sample(count, exclude, skip_locality)
+
+        seeders = seeder_list.sample(count, exclude, skip_locality)
+        candidates = leecher_list.sample(count * max(1, settings.PEER_SELECTION_OVERSAMPLE), exclude, skip_locality)
+        leechers = heapq.nsmallest(count, candidates, key=lambda p: p.left)
+
+        seeder_slots = max(round(count * settings.PEER_SELECTION_SEEDER_SHARE), count - len(leechers))
+        selected = seeders[:seeder_slots]
+        selected.extend(leechers[:count - len(selected)])
+        return selected
+
+    def counts(self) -> tuple:
+        """Return (seeders, leechers)"""
+        return self.seeders, self.leechers
+
+class SwarmRegistry:
+    """Maps info_hash to swarm and persists changes asynchronously"""
+
+    def __init__(self):
+        self.swarms: Dict[str, Swarm] = {}
+        self.lock = threading.Lock()
+        self.write_queue: queue.Queue = queue.Queue(maxsize=settings.SWARM_WRITE_QUEUE_SIZE)
+        self.writer_thread: Optional[threading.Thread] = None
+        self.reconcile_thread: Optional[threading.Thread] = None
+        self.stop_event = threading.Event()
+        self.running = False
+        self.local = threading.local()  # Writes collected by batch() on this thread
+        self.shed_writes = 0  # Writes dropped because the write queue was full
+        self.overflow_deletes: List[tuple] = []  # Deletes that found the queue full, never shed
+        self.overflow_lock = threading.Lock()
+
+    def start(self):
+        """Start the background database writer and reconciliation job"""
+        with self.lock:
+            if self.running:
+                return
+            self.running = True
+        self.stop_event.clear()
+        self.writer_thread = threading.Thread(target=self._writer_loop, daemon=True)
+        self.writer_thread.start()
+        self.reconcile_thread = threading.Thread(target=self._reconcile_loop, daemon=True)
+        self.reconcile_thread.start()
+        print("🗂️  Swarm registry writer started")
+
+    def stop(self):
+        """Flush pending writes and stop the background threads"""
+        if not self.running:
+            return
+        self.flush()
+        self.running = False
+        self.stop_event.set()
+        self.write_queue.put(None)  # Wake the writer so it can exit
+        if self.writer_thread:
+            self.writer_thread.join(timeout=5)
+        print("🛑 Swarm registry writer stopped")
+
+    def flush(self):
+        """Block until all queued writes have been applied"""
+        if self.running:
+            self.write_queue.join()
+
+    def clear(self):
+        """Drop all cached swarms so they are reloaded from the database"""
+        self.flush()
+        with self.lock:
+            self.swarms.clear()
+
+    # Swarm lookup
+    def get_swarm(self, info_hash: str, db: Session) -> Optional[Swarm]:
+        """Get the swarm for a torrent, loading it from the database on first use"""
+        swarm = self.swarms.get(info_hash)
+        if swarm is not None:
+            return swarm
+
+        torrent = torrent_cache.get(info_hash, db)
+        if not torrent:
+            return None
+
+        cutoff = datetime.utcnow() - PEER_TIMEOUT
+        peers = db.query(Peer).filter(
+            and_(
+                Peer.torrent_id == torrent.id,
+                Peer.last_announce > cutoff
+            )
+        ).all()
+
+        return self._add_swarm(torrent, peers)
+
+    async def get_swarm_async(self, info_hash: str, db: AsyncSession) -> Optional[Swarm]:
+        """Async variant of get_swarm for endpoints running on the event loop"""
+        swarm = self.swarms.get(info_hash)
+        if swarm is not None:
+            return swarm
+
+        torrent = await torrent_cache.get_async(info_hash, db)
+        if not torrent:
+            return None
+
+        cutoff = datetime.utcnow() - PEER_TIMEOUT
+        result = await db.execute(select(Peer).where(
+            and_(
+                Peer.torrent_id == torrent.id,
+                Peer.last_announce > cutoff
+            )
+        ))
+
+        return self._add_swarm(torrent, result.scalars().all())
+
+    def _add_swarm(self, torrent: TorrentResponse, peers: List[Peer]) -> Swarm:
+        swarm = Swarm(torrent.id, torrent.info_hash, torrent.completed or 0)
+        for peer in peers:
+            swarm.add_peer(SwarmPeer.from_model(peer))
+
+        with self.lock:
+            # Another thread may have loaded the same swarm meanwhile
+            return self.swarms.setdefault(torrent.info_hash, swarm)
+
+    def cached_stats(self, info_hash: str) -> Optional[Tuple[int, int, int]]:
+        """Return (seeders, leechers, completed) of a loaded swarm without touching the database"""
+        swarm = self.swarms.get(info_hash)
+        if swarm is None:
+            return None
+        return swarm.seeders, swarm.leechers, swarm.completed
+
+    def totals(self) -> Tuple[int, int, int, int]:
+        """Return (swarms, seeders, leechers, peers) across all loaded swarms"""
+        with self.lock:
+            swarms = list(self.swarms.values())
+        seeders = sum(swarm.seeders for swarm in swarms)
+        leechers = sum(swarm.leechers for swarm in swarms)
+        return len(swarms), seeders, leechers, sum(len(swarm.peers) for swarm in swarms)
+
+    # Announce handling
+    def announce(self, swarm: Swarm, peer_id: str, ip_address: str, port: int,
+                 uploaded: int, downloaded: int, left: int,
+                 event: Optional[str] = None, max_peers: int = 50) -> List[SwarmPeer]:
+        """Apply an announce to the swarm and return peers for the caller"""
+        with swarm.lock:
+            if event == "stopped":
+                if swarm.remove_peer(peer_id) is not None:
+                    self._enqueue(('delete', swarm.torrent_id, peer_id))
+                    self._enqueue_torrent_stats(swarm)
+                return []
+
+            peer = swarm.peers.get(peer_id)
+            endpoint_changed = peer is None or (peer.ip_address, peer.port) != (ip_address, port)
+            # Only a peer finishing its download counts as completed, not a seeder repeating the event
+            just_completed = left == 0 and (peer is None or not peer.is_seeder)
+
+            # Re-announces spend a token whatever their event; state changes (seeder
+            # transitions, new endpoint) always go through
+            if (peer is not None and not endpoint_changed
+                    and peer.is_seeder == (left == 0) and not peer.take_token()):
+                # Announcing faster than min_interval: replay the last response, no write
+                return peer.last_sample
+
+            if endpoint_changed:
+                # One peer per ip:port in a swarm, a restarted client replaces its old peer_id
+                previous_id = swarm.endpoints.get((ip_address, port))
+                if previous_id is not None and previous_id != peer_id:
+                    swarm.remove_peer(previous_id)
+
+            if peer is None:
+                peer = SwarmPeer(peer_id, ip_address, port, swarm.torrent_id, left=left)
+                peer.take_token()  # The first announce counts against the burst
+                swarm.add_peer(peer)
+            else:
+                swarm.set_seeder(peer, left == 0)
+                if endpoint_changed:
+                    swarm.move_peer(peer, ip_address, port)
+
+            peer.uploaded = uploaded
+            peer.downloaded = downloaded
+            peer.left = left
+            peer.last_announce = datetime.utcnow()
+
+            if event == "completed" and just_completed:
+                swarm.completed += 1
+
+            self._enqueue(('upsert', swarm.torrent_id, peer, endpoint_changed))
+            self._enqueue_torrent_stats(swarm)
+
+            # Peers useful to the announcing peer's role and nearby ones first, excluding itself
+            peer.last_sample = swarm.select_peers(
+                max_peers, peer.is_seeder, exclude_peer_id=peer_id, locality=peer.locality
+            )
+            return peer.last_sample
+
+    @contextmanager
+    def batch(self):
+        """Collect the writes of every announce applied inside the block and persist
+        them in a single transaction
+        
+        Writes are collected per thread, so nothing may await inside the block.
+        """
+        self.local.ops = []
+        try:
+            yield
+        finally:
+            ops, self.local.ops = self.local.ops, None
+            if ops:
+                self._submit(ops)
+
+    # Counter reconciliation
+    def reconcile(self, torrent_ids: Optional[Set[int]] = None):
+        """Expire stale peers and fix any drift in seeder/leecher counters
+        
+        Covers every torrent, or only torrent_ids when given.
+        """
+        with self.lock:
+            swarms = [
+                swarm for swarm in self.swarms.values()
+                if torrent_ids is None or swarm.torrent_id in torrent_ids
+            ]
+
+        for swarm in swarms:
+            with swarm.lock:
+                expired = swarm.expire_peers()
+                drifted = swarm.recount()
+                if expired or drifted:
+                    self._enqueue_torrent_stats(swarm)
+
+        # Torrents without a loaded swarm are recounted in the database
+        loaded = {swarm.torrent_id for swarm in swarms}
+        if torrent_ids is not None and not (torrent_ids - loaded):
+            return
+
+        db = SessionLocal()
+        try:
+            cutoff = datetime.utcnow() - PEER_TIMEOUT
+            peer_counts = db.query(Peer.torrent_id, Peer.is_seeder, func.count(Peer.id)).filter(
+                Peer.last_announce > cutoff
+            )
+            torrents = db.query(Torrent.id, Torrent.seeders, Torrent.leechers)
+            if torrent_ids is not None:
+                peer_counts = peer_counts.filter(Peer.torrent_id.in_(torrent_ids - loaded))
+                torrents = torrents.filter(Torrent.id.in_(torrent_ids - loaded))
+
+            actual: Dict[int, List[int]] = {}
+            updated: Dict[int, Dict[str, int]] = {}
+            for torrent_id, is_seeder, count in peer_counts.group_by(Peer.torrent_id, Peer.is_seeder).all():
+                actual.setdefault(torrent_id, [0, 0])[0 if is_seeder else 1] = count
+
+            for torrent in torrents.all():
+                if torrent.id in loaded:
+                    continue
+                seeders, leechers = actual.get(torrent.id, [0, 0])
+                if (torrent.seeders, torrent.leechers) != (seeders, leechers):
+                    db.query(Torrent).filter(Torrent.id == torrent.id).update(
+                        {'seeders': seeders, 'leechers': leechers}, synchronize_session=False
+                    )
+                    updated[torrent.id] = {'seeders': seeders, 'leechers': leechers}
+            db.commit()
+
+            for torrent_id, counters in updated.items():
+                torrent_cache.update_counters(torrent_id, counters)
+        except Exception as e:
+            db.rollback()
+            print(f"⚠️  Swarm counter reconciliation failed: {e}")
+        finally:
+            db.close()
+
+    def _reconcile_loop(self):
+        """Run reconciliation periodically until stopped"""
+        while not self.stop_event.wait(settings.SWARM_RECONCILE_INTERVAL):
+            self.reconcile()
+
+    def _enqueue_torrent_stats(self, swarm: Swarm):
+        seeders, leechers = swarm.counts()
+        self._enqueue(('torrent', swarm.torrent_id, {
+            'seeders': seeders,
+            'leechers': leechers,
+            'completed': swarm.completed
+        }))
+
+    # Write-through
+    def _enqueue(self, op: tuple):
+        if op[0] == 'upsert':
+            # Snapshot now so later announces do not race the writer
+            op = (op[0], op[1], op[2].snapshot(), op[2], op[3])
+
+        batch_ops = getattr(self.local, 'ops', None)
+        if batch_ops is not None:
+            batch_ops.append(op)
+        elif self._use_writer():
+            self._put(op)
+        else:
+            # No background writer (scripts, tests): write synchronously
+            self._write([op])
+
+    def _submit(self, ops: List[tuple]):
+        """Persist a batch of writes in one transaction"""
+        if self._use_writer():
+            # Queued as one item so the writer commits it in a single group commit
+            self._put(('batch', ops))
+        else:
+            self._write(self._coalesce(ops))
+
+    def _use_writer(self) -> bool:
+        """Whether writes go through the background writer
+        
+        Announces applied on an event loop must never touch the database inline, so
+        the writer is started on first use there when the app has not started it.
+        """
+        if not self.running:
+            try:
+                asyncio.get_running_loop()
+            except RuntimeError:
+                return False
+            self.start()
+        return True
+
+    def _put(self, item: tuple):
+        """Queue a write without blocking, shedding it when the queue is full
+        
+        The swarm in memory stays authoritative: the peer is written again on its next
+        announce and reconciliation repairs the counters. Deletes have no such second
+        chance, a stopped peer's row would be served and reloaded as live, so they are
+        kept aside for the writer's next batch instead.
+        """
+        try:
+            self.write_queue.put_nowait(item)
+        except queue.Full:
+            ops = item[1] if item[0] == 'batch' else [item]
+            deletes = [op for op in ops if op[0] == 'delete']
+            if deletes:
+                with self.overflow_lock:
+                    self.overflow_deletes.extend(deletes)
+            if len(deletes) == len(ops):
+                return
+            self.shed_writes += 1
+            if self.shed_writes % 1000 == 1:
+                logger.warning("Swarm write queue full, %d writes shed so far", self.shed_writes)
+
+    def _writer_loop(self):
+        """Apply queued writes in group commits until stopped
+        
+        The first queued write opens a batch that collects further writes until
+        SWARM_WRITE_BATCH_SIZE records are queued or the SWARM_WRITE_FLUSH_MS
+        durability window closes, then everything is committed in one transaction.
+        """
+        window = settings.SWARM_WRITE_FLUSH_MS / 1000
+        while self.running:
+            batch = [self.write_queue.get()]
+            deadline = time.monotonic() + window
+            while len(batch) < settings.SWARM_WRITE_BATCH_SIZE:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(self.write_queue.get(timeout=remaining))
+                except queue.Empty:
+                    break
+
+            try:
+                ops = []
+                for op in batch:
+                    if op is None:
+                        continue
+                    if op[0] == 'batch':
+                        ops.extend(op[1])
+                    else:
+                        ops.append(op)
+                # Set aside while the queue was full, so behind what this batch took from it
+                with self.overflow_lock:
+                    ops.extend(self.overflow_deletes)
+                    self.overflow_deletes = []
+                if ops:
+                    self._write(self._coalesce(ops))
+            finally:
+                for _ in batch:
+                    self.write_queue.task_done()
+
+    @staticmethod
+    def _coalesce(ops: List[tuple]) -> List[tuple]:
+        """Collapse a batch to the last write per peer and per torrent"""
+        peer_ops: Dict[Tuple[int, str], tuple] = {}
+        torrent_ops: Dict[int, tuple] = {}
+        for op in ops:
+            kind, torrent_id = op[0], op[1]
+            if kind == 'torrent':
+                torrent_ops[torrent_id] = op
+                continue
+
+            key = (torrent_id, op[2]['peer_id'] if kind == 'upsert' else op[2])
+            previous = peer_ops.pop(key, None)
+            if kind == 'upsert' and previous is not None and previous[0] == 'upsert' and previous[4]:
+                # Keep the endpoint cleanup of an earlier upsert in the batch
+                op = op[:4] + (True,)
+            peer_ops[key] = op  # Re-inserted so peers stay ordered by their last write
+
+        return list(peer_ops.values()) + list(torrent_ops.values())
+
+    def _write(self, ops: List[tuple]):
+        """Apply write operations in a single transaction
+        
+        When the transaction fails the batch is split in halves and each is retried,
+        so one bad write only loses itself instead of the whole group commit.
+        """
+        try:
+            self._apply(ops)
+        except Exception:
+            if len(ops) > 1:
+                middle = len(ops) // 2
+                self._write(ops[:middle])
+                self._write(ops[middle:])
+            else:
+                logger.exception("Swarm registry write failed, dropping %s for torrent %s", ops[0][0], ops[0][1])
+
+    def _apply(self, ops: List[tuple]):
+        db = SessionLocal()
+        try:
+            written = []
+            for op in ops:
+                kind, torrent_id, payload = op[0], op[1], op[2]
+                if kind == 'upsert':
+                    swarm_peer, endpoint_changed = op[3], op[4]
+                    if endpoint_changed:
+                        # Free the ip:port from any other peer_id still holding it
+                        db.query(Peer).filter(
+                            and_(
+                                Peer.torrent_id == torrent_id,
+                                Peer.ip_address == payload['ip_address'],
+                                Peer.port == payload['port'],
+                                Peer.peer_id != payload['peer_id']
+                            )
+                        ).delete(synchronize_session=False)
+
+                    upsert = sqlite_insert(Peer).values(**payload)
+                    upsert = upsert.on_conflict_do_update(
+                        index_elements=[Peer.torrent_id, Peer.peer_id],
+                        set_={key: upsert.excluded[key] for key in payload
+                              if key not in ('torrent_id', 'peer_id')}
+                    ).returning(Peer.id)
+                    written.append((db.execute(upsert).scalar(), swarm_peer))
+                elif kind == 'delete':
+                    db.query(Peer).filter(
+                        and_(
+                            Peer.peer_id == payload,
+                            Peer.torrent_id == torrent_id
+                        )
+                    ).delete(synchronize_session=False)
+                elif kind == 'torrent':
+                    db.query(Torrent).filter(Torrent.id == torrent_id).update(
+                        payload, synchronize_session=False
+                    )
+            db.commit()
+
+            # Hand database ids back to the in-memory peers
+            for row_id, swarm_peer in written:
+                swarm_peer.id = row_id
+
+            for op in ops:
+                if op[0] == 'torrent':
+                    torrent_cache.update_counters(op[1], op[2])
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+
+# Global instance
+swarm_registry = SwarmRegistry()
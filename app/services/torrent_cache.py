@@ -0,0 +1,102 @@
+"""
+Torrent Cache
+Bounded LRU cache of info_hash lookups, including unknown hashes, so repeat
+lookups of hot torrents are answered without querying the database
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.models.torrent import Torrent
+from app.schemas.torrent import TorrentResponse
+
+class TorrentCache:
+    """info_hash -> torrent row (id, sizes, counters), or a negative entry for unknown hashes"""
+
+    def __init__(self, max_size: Optional[int] = None):
+        self.max_size = max_size or settings.TORRENT_CACHE_SIZE
+        # info_hash -> (torrent, expires_at); torrent is None for unknown hashes
+        self.entries: "OrderedDict[str, Tuple[Optional[TorrentResponse], float]]" = OrderedDict()
+        self.info_hashes: Dict[int, str] = {}  # torrent id -> info_hash, for updates by id
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def lookup(self, info_hash: str) -> Tuple[bool, Optional[TorrentResponse]]:
+        """Return (found, torrent) without touching the database"""
+        with self.lock:
+            entry = self.entries.get(info_hash)
+            if entry is None or entry[1] < time.monotonic():
+                self.misses += 1
+                return False, None
+            self.entries.move_to_end(info_hash)
+            self.hits += 1
+            return True, entry[0]
+
+    def put(self, info_hash: str, torrent: Optional[TorrentResponse]):
+        """Cache a torrent, or remember that info_hash is unknown for a while"""
+        # Unknown hashes expire so torrents added behind the tracker's back show up
+        expires_at = float("inf") if torrent is not None else time.monotonic() + settings.TORRENT_CACHE_NEGATIVE_TTL
+        with self.lock:
+            self.entries[info_hash] = (torrent, expires_at)
+            self.entries.move_to_end(info_hash)
+            if torrent is not None:
+                self.info_hashes[torrent.id] = info_hash
+            while len(self.entries) > self.max_size:
+                _, (evicted, _) = self.entries.popitem(last=False)
+                if evicted is not None:
+                    self.info_hashes.pop(evicted.id, None)
+
+    def get(self, info_hash: str, db: Session) -> Optional[TorrentResponse]:
+        """Get a torrent by info hash, querying the database only on a cache miss"""
+        found, torrent = self.lookup(info_hash)
+        if found:
+            return torrent
+
+        row = db.query(Torrent).filter(Torrent.info_hash == info_hash).first()
+        torrent = TorrentResponse.from_orm(row) if row else None
+        self.put(info_hash, torrent)
+        return torrent
+
+    async def get_async(self, info_hash: str, db: AsyncSession) -> Optional[TorrentResponse]:
+        """Async variant of get for endpoints running on the event loop"""
+        found, torrent = self.lookup(info_hash)
+        if found:
+            return torrent
+
+        result = await db.execute(select(Torrent).where(Torrent.info_hash == info_hash))
+        row = result.scalars().first()
+        torrent = TorrentResponse.from_orm(row) if row else None
+        self.put(info_hash, torrent)
+        return torrent
+
+    def update_counters(self, torrent_id: int, counters: Dict[str, int]):
+        """Apply a seeder/leecher/completed update written to the database"""
+        with self.lock:
+            info_hash = self.info_hashes.get(torrent_id)
+            if info_hash is None:
+                return
+            torrent, expires_at = self.entries[info_hash]
+            self.entries[info_hash] = (torrent.model_copy(update=counters), expires_at)
+
+    def invalidate(self, info_hash: str):
+        """Drop an entry, positive or negative"""
+        with self.lock:
+            entry = self.entries.pop(info_hash, None)
+            if entry is not None and entry[0] is not None:
+                self.info_hashes.pop(entry[0].id, None)
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+            self.info_hashes.clear()
+
+# Global instance
+torrent_cache = TorrentCache()
@@ -1,17 +1,96 @@
+import base64
+import hashlib
+import json
 from sqlalchemy.orm import Session
-from sqlalchemy import and_
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import and_, select, tuple_
 from fastapi import HTTPException
-from typing import List, Optional, Dict, Any
-from datetime import datetime, timedelta
+from typing import List, Optional, Dict, Any, Tuple
+from datetime import datetime
 
+from app.core.config import settings
 from app.db.session import get_db
 from app.models.torrent import Torrent
 from app.models.peer import Peer
 from app.models.user import User
-from app.schemas.torrent import TorrentCreate, TorrentResponse, TorrentAnnounceRequest
+from app.schemas.torrent import TorrentCreate, TorrentResponse, TorrentAnnounceRequest, ScrapeResponse, ScrapeStats, BatchAnnounceResponse
 from app.schemas.peer import PeerResponse, PeerListResponse
 from app.schemas.user import UserCreate, UserResponse
 from app.utils.bittorrent import BitTorrentUtils
+from app.services.swarm_registry import swarm_registry, Swarm, SwarmPeer, PEER_TIMEOUT
+from app.services.tracker_stats import tracker_stats
+from app.services.torrent_cache import torrent_cache
+
+ANNOUNCE_INTERVAL = 1800  # Announce interval in seconds (30 minutes)
+
+# Keyset columns of each torrent list sort, and whether the sort is descending
+TORRENT_SORTS = {
+    "created_at": ((Torrent.id,), True),  # Newest first, ids grow with created_at
+    "seeders": ((Torrent.seeders, Torrent.id), True),
+    "name": ((Torrent.name, Torrent.id), False),
+}
+
+def encode_cursor(values: List[Any]) -> str:
+    """Opaque page cursor holding the keyset values of the last row"""
+    return base64.urlsafe_b64encode(json.dumps(values).encode()).decode("ascii")
+
+def decode_cursor(cursor: str, columns: Tuple[Any, ...]) -> List[Any]:
+    """Keyset values of a page cursor, each checked against the type of its sort column"""
+    try:
+        values = json.loads(base64.urlsafe_b64decode(cursor.encode("ascii")))
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    if not isinstance(values, list) or len(values) != len(columns):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    return [_cursor_value(value, column) for value, column in zip(values, columns)]
+
+def _cursor_value(value: Any, column: Any) -> Any:
+    python_type = column.type.python_type
+    if python_type is datetime:
+        if isinstance(value, str):
+            try:
+                return datetime.fromisoformat(value)
+            except ValueError:
+                pass
+    elif python_type is float:
+        if isinstance(value, (int, float)) and not isinstance(value, bool):
+            return value
+    elif isinstance(value, python_type) and not isinstance(value, bool):
+        return value
+    raise HTTPException(status_code=400, detail="Invalid cursor")
+
+def validate_announce(announce_data: TorrentAnnounceRequest):
+    """Reject announces with a malformed info hash or peer ID"""
+    # Validate info hash
+    if not BitTorrentUtils.validate_info_hash(announce_data.info_hash):
+        raise HTTPException(status_code=400, detail="Invalid info hash")
+    
+    # Validate peer ID
+    if not BitTorrentUtils.validate_peer_id(announce_data.peer_id):
+        raise HTTPException(status_code=400, detail="Invalid peer ID")
+
+def apply_announce(swarm: Swarm, announce_data: TorrentAnnounceRequest, client_ip: str) -> List[SwarmPeer]:
+    """Update the swarm in memory, the registry writes through to the database"""
+    # Use provided IP or client IP
+    peer_ip = announce_data.ip or client_ip
+    
+    return swarm_registry.announce(
+        swarm,
+        peer_id=announce_data.peer_id,
+        ip_address=peer_ip,
+        port=announce_data.port,
+        uploaded=announce_data.uploaded,
+        downloaded=announce_data.downloaded,
+        left=announce_data.left,
+        event=announce_data.event or None,  # event= with no value is a regular announce
+        max_peers=clamp_numwant(announce_data.numwant)
+    )
+
+def clamp_numwant(numwant: Optional[int]) -> int:
+    """Clamp the requested number of peers to the server-side cap"""
+    if numwant is None or numwant < 0:
+        return settings.ANNOUNCE_NUMWANT_DEFAULT
+    return min(numwant, settings.ANNOUNCE_NUMWANT_MAX)
 
 class TrackerService:
     def __init__(self, db: Session):
@@ -21,10 +100,10 @@ class TrackerService:
     def create_torrent(self, torrent_data: TorrentCreate) -> TorrentResponse:
         """Create a new torrent in the tracker"""
         # Check if torrent already exists
-        existing = self.db.query(Torrent).filter(Torrent.info_hash == torrent_data.info_hash).first()
+        existing = torrent_cache.get(torrent_data.info_hash, self.db)
         if existing:
             # Return existing torrent instead of raising an error
-            return TorrentResponse.from_orm(existing)
+            return existing
         
         torrent = Torrent(
             info_hash=torrent_data.info_hash,
@@ -39,134 +118,109 @@ class TrackerService:
         self.db.commit()
         self.db.refresh(torrent)
         
-        return TorrentResponse.from_orm(torrent)
+        # Replaces the negative entry left by announces for the unknown hash
+        response = TorrentResponse.from_orm(torrent)
+        torrent_cache.put(torrent.info_hash, response)
+        return response
     
     def get_torrent(self, info_hash: str) -> Optional[TorrentResponse]:
         """Get torrent by info hash"""
-        torrent = self.db.query(Torrent).filter(Torrent.info_hash == info_hash).first()
-        if torrent:
-            return TorrentResponse.from_orm(torrent)
-        return None
+        return torrent_cache.get(info_hash, self.db)
     
-    def list_torrents(self, limit: int = 100) -> List[TorrentResponse]:
-        """List all torrents"""
-        torrents = self.db.query(Torrent).limit(limit).all()
-        return [TorrentResponse.from_orm(t) for t in torrents]
+    def get_piece_hashes(self, info_hash: str) -> Optional[bytes]:
+        """Get the concatenated piece hashes of a torrent, the only query that loads them"""
+        row = self.db.query(Torrent.pieces_hash).filter(Torrent.info_hash == info_hash).first()
+        return row.pieces_hash if row else None
     
-    # Peer announce and tracking
-    def announce(self, announce_data: TorrentAnnounceRequest, client_ip: str) -> PeerListResponse:
-        """Handle peer announce request"""
-        # Validate info hash
-        if not BitTorrentUtils.validate_info_hash(announce_data.info_hash):
-            raise HTTPException(status_code=400, detail="Invalid info hash")
-        
-        # Validate peer ID
-        if not BitTorrentUtils.validate_peer_id(announce_data.peer_id):
-            raise HTTPException(status_code=400, detail="Invalid peer ID")
-        
-        # Get torrent
-        torrent = self.db.query(Torrent).filter(Torrent.info_hash == announce_data.info_hash).first()
-        if not torrent:
-            raise HTTPException(status_code=404, detail="Torrent not found")
-        
-        # Use provided IP or client IP
-        peer_ip = announce_data.ip or client_ip
-        
-        # Find or create peer
-        peer = self.db.query(Peer).filter(
-            and_(
-                Peer.peer_id == announce_data.peer_id,
-                Peer.torrent_id == torrent.id
-            )
+    def get_torrent_etag(self, info_hash: str) -> Optional[str]:
+        """Get the ETag of the stored .torrent file without loading its bytes"""
+        row = self.db.query(Torrent.torrent_etag).filter(Torrent.info_hash == info_hash).first()
+        return row.torrent_etag if row else None
+    
+    def get_torrent_file(self, info_hash: str) -> Optional[Tuple[bytes, str]]:
+        """Get the stored .torrent file bytes and their ETag"""
+        row = self.db.query(Torrent.torrent_file, Torrent.torrent_etag).filter(
+            Torrent.info_hash == info_hash
         ).first()
-        
-        if not peer:
-            peer = Peer(
-                peer_id=announce_data.peer_id,
-                ip_address=peer_ip,
-                port=announce_data.port,
-                torrent_id=torrent.id
-            )
-            self.db.add(peer)
-        
-        # Update peer information
-        peer.ip_address = peer_ip
-        peer.port = announce_data.port
-        peer.uploaded = announce_data.uploaded
-        peer.downloaded = announce_data.downloaded
-        peer.left = announce_data.left
-        peer.is_seeder = announce_data.left == 0
-        peer.last_announce = datetime.utcnow()
-        
-        # Handle events
-        if announce_data.event == "completed":
-            torrent.completed += 1
-        elif announce_data.event == "stopped":
-            self.db.delete(peer)
-            self.db.commit()
-            return PeerListResponse(peers=[])
-        
+        if not row or row.torrent_file is None:
+            return None
+        return row.torrent_file, row.torrent_etag
+    
+    def store_torrent_file(self, info_hash: str, content: bytes) -> str:
+        """Store the serialized .torrent file of a torrent and return its strong ETag"""
+        etag = hashlib.sha1(content).hexdigest()
+        self.db.query(Torrent).filter(Torrent.info_hash == info_hash).update(
+            {'torrent_file': content, 'torrent_etag': etag}, synchronize_session=False
+        )
         self.db.commit()
+        return etag
+    
+    def list_torrents(self, limit: int = 100, sort: str = "created_at",
+                      cursor: Optional[str] = None) -> Tuple[List[TorrentResponse], Optional[str]]:
+        """List torrents one page at a time, returning the page and the cursor of the next one
         
-        # Update torrent stats
-        self._update_torrent_stats(torrent.id)
+        Pages are keyset paginated on (sort column, id), so each page costs an index
+        range scan no matter how deep it is. created_at follows insertion order and
+        pages on the primary key.
+        """
+        if sort not in TORRENT_SORTS:
+            raise HTTPException(status_code=400, detail=f"Invalid sort, expected one of {', '.join(TORRENT_SORTS)}")
+        columns, descending = TORRENT_SORTS[sort]
+        limit = max(1, min(limit, settings.TORRENT_PAGE_MAX))
         
-        # Get peer list (excluding the announcing peer)
-        peers = self.db.query(Peer).filter(
-            and_(
-                Peer.torrent_id == torrent.id,
-                Peer.peer_id != announce_data.peer_id,
-                Peer.last_announce > datetime.utcnow() - timedelta(hours=2)  # Active peers
-            )
-        ).limit(50).all()  # Limit to 50 peers
+        query = self.db.query(Torrent)
+        if cursor:
+            key = tuple_(*columns)
+            bound = tuple_(*decode_cursor(cursor, columns))
+            query = query.filter(key < bound if descending else key > bound)
         
-        peer_responses = [PeerResponse.from_orm(p) for p in peers]
+        order = [c.desc() if descending else c.asc() for c in columns]
         
-        return PeerListResponse(peers=peer_responses, interval=1800)  # 30 minutes
-    
-    def _update_torrent_stats(self, torrent_id: int):
-        """Update torrent seeder/leecher counts"""
-        torrent = self.db.query(Torrent).filter(Torrent.id == torrent_id).first()
-        if not torrent:
-            return
+        # One extra row tells whether another page follows
+        torrents = query.order_by(*order).limit(limit + 1).all()
+        next_cursor = None
+        if len(torrents) > limit:
+            torrents = torrents[:limit]
+            next_cursor = encode_cursor([getattr(torrents[-1], c.key) for c in columns])
         
-        active_cutoff = datetime.utcnow() - timedelta(hours=2)
+        return [TorrentResponse.from_orm(t) for t in torrents], next_cursor
+    
+    # Peer announce and tracking
+    def announce(self, announce_data: TorrentAnnounceRequest, client_ip: str) -> PeerListResponse:
+        """Handle peer announce request"""
+        peers = self._announce_to_swarm(announce_data, client_ip)
         
-        seeders = self.db.query(Peer).filter(
-            and_(
-                Peer.torrent_id == torrent_id,
-                Peer.is_seeder == True,
-                Peer.last_announce > active_cutoff
-            )
-        ).count()
+        if announce_data.event == "stopped":
+            return PeerListResponse(peers=[])
         
-        leechers = self.db.query(Peer).filter(
-            and_(
-                Peer.torrent_id == torrent_id,
-                Peer.is_seeder == False,
-                Peer.last_announce > active_cutoff
-            )
-        ).count()
+        peer_responses = [PeerResponse.from_orm(p) for p in peers]
         
-        torrent.seeders = seeders
-        torrent.leechers = leechers
-        self.db.commit()
+        return PeerListResponse(
+            peers=peer_responses,
+            interval=ANNOUNCE_INTERVAL,
+            min_interval=settings.ANNOUNCE_MIN_INTERVAL
+        )
     
-    def get_peers(self, info_hash: str) -> List[PeerResponse]:
-        """Get active peers for a torrent"""
-        torrent = self.db.query(Torrent).filter(Torrent.info_hash == info_hash).first()
-        if not torrent:
-            raise HTTPException(status_code=404, detail="Torrent not found")
+    def announce_compact(self, announce_data: TorrentAnnounceRequest, client_ip: str) -> bytes:
+        """Handle peer announce request, returning peers packed as 6-byte IPv4+port entries"""
+        peers = self._announce_to_swarm(announce_data, client_ip)
+        return BitTorrentUtils.pack_compact_peers((p.ip_address, p.port) for p in peers)
+    
+    def _announce_to_swarm(self, announce_data: TorrentAnnounceRequest, client_ip: str) -> List[SwarmPeer]:
+        """Validate an announce, apply it to the swarm and return peers for the caller"""
+        validate_announce(announce_data)
         
-        active_cutoff = datetime.utcnow() - timedelta(hours=2)
-        peers = self.db.query(Peer).filter(
-            and_(
-                Peer.torrent_id == torrent.id,
-                Peer.last_announce > active_cutoff
-            )
-        ).all()
+        # Get swarm (loaded from the database on first use)
+        swarm = swarm_registry.get_swarm(announce_data.info_hash, self.db)
+        if not swarm:
+            raise HTTPException(status_code=404, detail="Torrent not found")
         
-        return [PeerResponse.from_orm(p) for p in peers]
+        return apply_announce(swarm, announce_data, client_ip)
+    
+    def get_peer_count(self, info_hash: str) -> int:
+        """Number of peers in the in-memory swarm, current even before write-behind reaches the database"""
+        swarm = swarm_registry.get_swarm(info_hash, self.db)
+        return sum(swarm.counts()) if swarm else 0
     
     # User management
     def create_user(self, user_data: UserCreate) -> UserResponse:
@@ -199,64 +253,161 @@ class TrackerService:
     
     # Statistics
     def get_tracker_stats(self) -> Dict[str, Any]:
-        """Get tracker statistics"""
-        total_torrents = self.db.query(Torrent).count()
-        total_peers = self.db.query(Peer).count()
-        total_users = self.db.query(User).count()
-        
-        active_cutoff = datetime.utcnow() - timedelta(hours=2)
-        active_peers = self.db.query(Peer).filter(Peer.last_announce > active_cutoff).count()
-        
-        return {
-            'total_torrents': total_torrents,
-            'total_peers': total_peers,
-            'active_peers': active_peers,
-            'total_users': total_users
-        }
+        """Get tracker statistics from the periodically refreshed snapshot"""
+        return tracker_stats.get_totals()
     
     def cleanup_localhost_peers(self) -> int:
         """Remove all localhost (127.0.0.1) peers"""
+        swarm_registry.flush()
         count = self.db.query(Peer).filter(Peer.ip_address == "127.0.0.1").count()
         self.db.query(Peer).filter(Peer.ip_address == "127.0.0.1").delete()
         self.db.commit()
+        
+        # Reload swarms from the database on next use
+        swarm_registry.clear()
         return count
+
+
+class AsyncTrackerService:
+    """Async counterparts of the TrackerService announce, peer and stats paths"""
     
-    def deduplicate_peers(self) -> int:
-        """Remove duplicate peers (same IP:port for same torrent, keep the most recent)"""
-        # Get all peers grouped by IP, port, and torrent
-        from sqlalchemy import func
-        
-        subquery = self.db.query(
-            Peer.ip_address,
-            Peer.port,
-            Peer.torrent_id,
-            func.max(Peer.last_announce).label('max_announce')
-        ).group_by(
-            Peer.ip_address,
-            Peer.port,
-            Peer.torrent_id
-        ).subquery()
-        
-        # Get peers to keep (most recent for each IP:port:torrent combination)
-        peers_to_keep = self.db.query(Peer.id).join(
-            subquery,
-            and_(
-                Peer.ip_address == subquery.c.ip_address,
-                Peer.port == subquery.c.port,
-                Peer.torrent_id == subquery.c.torrent_id,
-                Peer.last_announce == subquery.c.max_announce
-            )
-        ).all()
+    def __init__(self, db: AsyncSession):
+        self.db = db
+    
+    async def get_torrent(self, info_hash: str) -> Optional[TorrentResponse]:
+        """Get torrent by info hash"""
+        return await torrent_cache.get_async(info_hash, self.db)
+    
+    async def announce(self, announce_data: TorrentAnnounceRequest, client_ip: str) -> PeerListResponse:
+        """Handle peer announce request"""
+        peers = await self._announce_to_swarm(announce_data, client_ip)
         
-        keep_ids = [p.id for p in peers_to_keep]
+        if announce_data.event == "stopped":
+            return PeerListResponse(peers=[])
         
-        # Count duplicates to be removed
-        if keep_ids:
-            count = self.db.query(Peer).filter(~Peer.id.in_(keep_ids)).count()
-            # Remove duplicates
-            self.db.query(Peer).filter(~Peer.id.in_(keep_ids)).delete(synchronize_session=False)
-        else:
-            count = 0
+        peer_responses = [PeerResponse.from_orm(p) for p in peers]
+        
+        return PeerListResponse(
+            peers=peer_responses,
+            interval=ANNOUNCE_INTERVAL,
+            min_interval=settings.ANNOUNCE_MIN_INTERVAL
+        )
+    
+    async def announce_compact(self, announce_data: TorrentAnnounceRequest, client_ip: str) -> bytes:
+        """Handle peer announce request, returning peers packed as 6-byte IPv4+port entries"""
+        peers = await self._announce_to_swarm(announce_data, client_ip)
+        return BitTorrentUtils.pack_compact_peers((p.ip_address, p.port) for p in peers)
+    
+    async def announce_batch(self, announces: List[TorrentAnnounceRequest], client_ip: str) -> BatchAnnounceResponse:
+        """Apply many announces (one seeder box, many torrents) and persist them in one transaction
+        
+        No peer lists are returned, the caller only registers itself.
+        """
+        if len(announces) > settings.ANNOUNCE_BATCH_MAX:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Too many announces, at most {settings.ANNOUNCE_BATCH_MAX} per request"
+            )
+        
+        failed = {}
+        ready = []
+        for announce_data in announces:
+            try:
+                validate_announce(announce_data)
+            except HTTPException as e:
+                failed[announce_data.info_hash] = e.detail
+                continue
             
-        self.db.commit()
-        return count
\ No newline at end of file
+            swarm = await swarm_registry.get_swarm_async(announce_data.info_hash, self.db)
+            if not swarm:
+                failed[announce_data.info_hash] = "Torrent not found"
+                continue
+            ready.append((swarm, announce_data.model_copy(update={'numwant': 0})))
+        
+        # Every swarm is loaded, so the batch runs without awaiting
+        with swarm_registry.batch():
+            for swarm, announce_data in ready:
+                apply_announce(swarm, announce_data, client_ip)
+        
+        return BatchAnnounceResponse(
+            accepted=len(ready),
+            failed=failed,
+            interval=ANNOUNCE_INTERVAL,
+            min_interval=settings.ANNOUNCE_MIN_INTERVAL
+        )
+    
+    async def _announce_to_swarm(self, announce_data: TorrentAnnounceRequest, client_ip: str) -> List[SwarmPeer]:
+        validate_announce(announce_data)
+        
+        swarm = await swarm_registry.get_swarm_async(announce_data.info_hash, self.db)
+        if not swarm:
+            raise HTTPException(status_code=404, detail="Torrent not found")
+        
+        return apply_announce(swarm, announce_data, client_ip)
+    
+    async def scrape(self, info_hashes: List[str]) -> ScrapeResponse:
+        """Seeder, leecher and completed counts for many torrents in one call
+        
+        Loaded swarms answer from memory, the rest come from the counters kept on
+        the torrent rows in a single query.
+        """
+        if len(info_hashes) > settings.SCRAPE_MAX_HASHES:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Too many info hashes (max {settings.SCRAPE_MAX_HASHES})"
+            )
+        
+        files: Dict[str, ScrapeStats] = {}
+        missing = []
+        for info_hash in dict.fromkeys(info_hashes):
+            cached = swarm_registry.cached_stats(info_hash)
+            if cached is None:
+                missing.append(info_hash)
+            else:
+                seeders, leechers, completed = cached
+                files[info_hash] = ScrapeStats(complete=seeders, incomplete=leechers, downloaded=completed)
+        
+        if missing:
+            result = await self.db.execute(
+                select(Torrent.info_hash, Torrent.seeders, Torrent.leechers, Torrent.completed)
+                .where(Torrent.info_hash.in_(missing))
+            )
+            for info_hash, seeders, leechers, completed in result.all():
+                files[info_hash] = ScrapeStats(
+                    complete=seeders or 0,
+                    incomplete=leechers or 0,
+                    downloaded=completed or 0
+                )
+        
+        return ScrapeResponse(files=files)
+    
+    async def get_peers(self, info_hash: str) -> List[PeerResponse]:
+        """Get active peers for a torrent"""
+        torrent = await torrent_cache.get_async(info_hash, self.db)
+        if torrent is None:
+            raise HTTPException(status_code=404, detail="Torrent not found")
+        torrent_id = torrent.id
+        
+        active_cutoff = datetime.utcnow() - PEER_TIMEOUT
+        result = await self.db.execute(select(Peer).where(
+            and_(
+                Peer.torrent_id == torrent_id,
+                Peer.last_announce > active_cutoff
+            )
+        ))
+        
+        return [PeerResponse.from_orm(p) for p in result.scalars().all()]
+    
+    async def get_tracker_stats(self) -> Dict[str, Any]:
+        """Get tracker statistics from the periodically refreshed snapshot"""
+        return tracker_stats.get_totals()
+    
+    async def get_torrent_stats(self, info_hash: str) -> Dict[str, int]:
+        """Get seeder/leecher/completed rollup for one torrent"""
+        stats = tracker_stats.get_torrent(info_hash)
+        if stats is None:
+            # Torrent added after the last snapshot, load its swarm for live counters
+            if await swarm_registry.get_swarm_async(info_hash, self.db) is None:
+                raise HTTPException(status_code=404, detail="Torrent not found")
+            stats = tracker_stats.get_torrent(info_hash)
+        return stats
@@ -0,0 +1,157 @@
+"""
+Tracker Statistics
+Tracker-wide totals and per-torrent rollups, recomputed in the background so
+stats requests are answered from memory
+"""
+
+import threading
+import time
+from datetime import datetime
+from typing import Dict, Optional
+
+from sqlalchemy import and_, case, func
+
+from app.core.config import settings
+from app.db.session import SessionLocal
+from app.models.torrent import Torrent
+from app.models.peer import Peer
+from app.models.user import User
+from app.services.swarm_registry import swarm_registry, PEER_TIMEOUT
+
+EMPTY_TOTALS = {'total_torrents': 0, 'total_peers': 0, 'active_peers': 0, 'total_users': 0}
+
+class TrackerStats:
+    """Snapshot of tracker statistics refreshed every TRACKER_STATS_TTL seconds
+
+    Readers never run the refresh themselves: a missing or stale snapshot is
+    refreshed on a background thread while the current one (or zeros) is served.
+    """
+
+    def __init__(self):
+        self.totals: Optional[Dict[str, int]] = None
+        self.torrents: Dict[str, Dict[str, int]] = {}  # info_hash -> per-torrent rollup
+        self.refreshed_at = 0.0
+        self.lock = threading.Lock()  # Serializes refreshes
+        self.pending = threading.Lock()  # Held while an on-demand refresh is queued or running
+        self.thread: Optional[threading.Thread] = None
+        self.refresh_thread: Optional[threading.Thread] = None
+        self.stop_event = threading.Event()
+        self.running = False
+
+    def start(self):
+        """Start refreshing the snapshot in the background"""
+        if self.running:
+            return
+        self.running = True
+        self.stop_event.clear()
+        self.thread = threading.Thread(target=self._refresh_loop, daemon=True)
+        self.thread.start()
+        print("📊 Tracker stats refresher started")
+
+    def stop(self):
+        """Stop the background refresher"""
+        if not self.running:
+            return
+        self.running = False
+        self.stop_event.set()
+        if self.thread:
+            self.thread.join(timeout=5)
+        print("🛑 Tracker stats refresher stopped")
+
+    def refresh(self):
+        """Recompute totals and per-torrent rollups with one pass over each table"""
+        with self.lock:
+            cutoff = datetime.utcnow() - PEER_TIMEOUT
+            db = SessionLocal()
+            try:
+                total_peers = db.query(func.count(Peer.id)).scalar()
+                total_users = db.query(func.count(User.id)).scalar()
+
+                # Active peers per torrent, torrents without peers included
+                rows = db.query(
+                    Torrent.info_hash,
+                    Torrent.completed,
+                    func.count(Peer.id),
+                    func.coalesce(func.sum(case((Peer.is_seeder == True, 1), else_=0)), 0)
+                ).outerjoin(
+                    Peer, and_(Peer.torrent_id == Torrent.id, Peer.last_announce > cutoff)
+                ).group_by(Torrent.id).all()
+            finally:
+                db.close()
+
+            torrents = {
+                info_hash: {
+                    'seeders': seeders,
+                    'leechers': active - seeders,
+                    'completed': completed or 0,
+                    'active_peers': active
+                }
+                for info_hash, completed, active, seeders in rows
+            }
+
+            # Swap in the new snapshot whole so readers never see a partial one
+            self.torrents = torrents
+            self.totals = {
+                'total_torrents': len(torrents),
+                'total_peers': total_peers,
+                'active_peers': sum(t['active_peers'] for t in torrents.values()),
+                'total_users': total_users
+            }
+            self.refreshed_at = time.monotonic()
+
+    def get_totals(self) -> Dict[str, int]:
+        """Tracker-wide totals from the latest snapshot, zeros until the first one is ready"""
+        if self._stale():
+            self._refresh_in_background()
+        totals = self.totals
+        return dict(totals if totals is not None else EMPTY_TOTALS)
+
+    def get_torrent(self, info_hash: str) -> Optional[Dict[str, int]]:
+        """Per-torrent rollup, live counters for swarms loaded in memory"""
+        cached = swarm_registry.cached_stats(info_hash)
+        if cached is not None:
+            seeders, leechers, completed = cached
+            return {
+                'seeders': seeders,
+                'leechers': leechers,
+                'completed': completed,
+                'active_peers': seeders + leechers
+            }
+
+        if self._stale():
+            self._refresh_in_background()
+        rollup = self.torrents.get(info_hash)
+        return dict(rollup) if rollup is not None else None
+
+    def _stale(self) -> bool:
+        # With the refresher running only the very first request computes the snapshot
+        if self.totals is None:
+            return True
+        return not self.running and time.monotonic() - self.refreshed_at > settings.TRACKER_STATS_TTL
+
+    def _refresh_in_background(self):
+        """Start one refresh off the request path unless one is already under way"""
+        if not self.pending.acquire(blocking=False):
+            return
+        self.refresh_thread = threading.Thread(target=self._refresh_once, daemon=True)
+        self.refresh_thread.start()
+
+    def _refresh_once(self):
+        try:
+            self.refresh()
+        except Exception as e:
+            print(f"⚠️  Tracker stats refresh failed: {e}")
+        finally:
+            self.pending.release()
+
+    def _refresh_loop(self):
+        """Refresh the snapshot periodically until stopped"""
+        while not self.stop_event.is_set():
+            try:
+                self.refresh()
+            except Exception as e:
+                print(f"⚠️  Tracker stats refresh failed: {e}")
+            self.stop_event.wait(settings.TRACKER_STATS_TTL)
+
+# Global instance
+tracker_stats = TrackerStats()
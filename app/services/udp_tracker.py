@@ -0,0 +1,177 @@
+"""
+UDP Tracker
+BEP 15 style UDP listener (connect, announce, scrape) sharing the swarm
+registry with the HTTP announce route
+"""
+
+import asyncio
+import hashlib
+import hmac
+import os
+import socket
+import struct
+import time
+from typing import Optional, Tuple
+
+from fastapi import HTTPException
+
+from app.core.config import settings
+from app.db.session import AsyncSessionLocal
+from app.schemas.torrent import TorrentAnnounceRequest
+from app.services.swarm_registry import swarm_registry
+from app.services.tracker_service import (
+    AsyncTrackerService, ANNOUNCE_INTERVAL, validate_announce, apply_announce
+)
+from app.utils.bittorrent import BitTorrentUtils
+
+PROTOCOL_ID = 0x41727101980  # Magic constant of the connect request
+
+ACTION_CONNECT = 0
+ACTION_ANNOUNCE = 1
+ACTION_SCRAPE = 2
+ACTION_ERROR = 3
+
+# Announce event codes as sent on the wire
+EVENTS = {0: None, 1: "completed", 2: "started", 3: "stopped"}
+
+CONNECTION_ID_WINDOW = 60  # Seconds, a connection ID stays valid for one to two windows
+
+class UDPTrackerProtocol(asyncio.DatagramProtocol):
+    """Decodes UDP tracker requests and answers them from the swarm registry"""
+
+    def __init__(self):
+        self.transport: Optional[asyncio.DatagramTransport] = None
+        self.secret = os.urandom(16)  # Signs connection IDs so no per-client state is kept
+        self.pending = set()  # Strong references to in-flight request tasks
+
+    def connection_made(self, transport):
+        self.transport = transport
+
+    def datagram_received(self, data: bytes, addr: Tuple[str, int]):
+        if len(data) < 16:
+            return
+        task = asyncio.ensure_future(self._handle(data, addr))
+        self.pending.add(task)
+        task.add_done_callback(self.pending.discard)
+
+    async def _handle(self, data: bytes, addr: Tuple[str, int]):
+        connection_id, action, transaction_id = struct.unpack('!QII', data[:16])
+        try:
+            if action == ACTION_CONNECT:
+                if connection_id != PROTOCOL_ID:
+                    return
+                response = struct.pack('!IIQ', ACTION_CONNECT, transaction_id, self._connection_id(addr))
+            elif not self._valid_connection_id(connection_id, addr):
+                response = self._error(transaction_id, "Invalid connection ID")
+            elif action == ACTION_ANNOUNCE:
+                response = await self._announce(data, addr, transaction_id)
+            elif action == ACTION_SCRAPE:
+                response = await self._scrape(data, transaction_id)
+            else:
+                response = self._error(transaction_id, "Unknown action")
+        except HTTPException as e:
+            response = self._error(transaction_id, str(e.detail))
+        except Exception as e:
+            print(f"⚠️  UDP tracker request from {addr[0]}:{addr[1]} failed: {e}")
+            response = self._error(transaction_id, "Internal error")
+
+        if self.transport is not None:
+            self.transport.sendto(response, addr)
+
+    async def _announce(self, data: bytes, addr: Tuple[str, int], transaction_id: int) -> bytes:
+        if len(data) < 98:
+            return self._error(transaction_id, "Malformed announce")
+
+        (info_hash, peer_id, downloaded, left, uploaded, event, ip, _key,
+         numwant, port) = struct.unpack('!20s20sQQQI4sIiH', data[16:98])
+
+        announce_data = TorrentAnnounceRequest(
+            info_hash=info_hash.hex(),
+            peer_id=peer_id.rstrip(b'\x00').decode('latin-1'),
+            ip=None if ip == b'\x00\x00\x00\x00' else socket.inet_ntoa(ip),
+            port=port,
+            uploaded=uploaded,
+            downloaded=downloaded,
+            left=left,
+            event=EVENTS.get(event),
+            compact=1,
+            numwant=None if numwant < 0 else numwant
+        )
+        validate_announce(announce_data)
+
+        swarm = swarm_registry.swarms.get(announce_data.info_hash)
+        if swarm is None:
+            async with AsyncSessionLocal() as db:
+                swarm = await swarm_registry.get_swarm_async(announce_data.info_hash, db)
+        if swarm is None:
+            return self._error(transaction_id, "Torrent not found")
+
+        peers = apply_announce(swarm, announce_data, addr[0])
+        seeders, leechers = swarm.counts()
+        packed_peers = BitTorrentUtils.pack_compact_peers((p.ip_address, p.port) for p in peers)
+
+        return struct.pack('!IIIII', ACTION_ANNOUNCE, transaction_id, ANNOUNCE_INTERVAL,
+                           leechers, seeders) + packed_peers
+
+    async def _scrape(self, data: bytes, transaction_id: int) -> bytes:
+        payload = data[16:]
+        info_hashes = [payload[i:i + 20].hex() for i in range(0, len(payload) - len(payload) % 20, 20)]
+
+        async with AsyncSessionLocal() as db:
+            scrape = await AsyncTrackerService(db).scrape(info_hashes)
+
+        response = bytearray(struct.pack('!II', ACTION_SCRAPE, transaction_id))
+        for info_hash in info_hashes:
+            stats = scrape.files.get(info_hash)
+            if stats is None:
+                response += struct.pack('!III', 0, 0, 0)
+            else:
+                response += struct.pack('!III', stats.complete, stats.downloaded, stats.incomplete)
+        return bytes(response)
+
+    def _connection_id(self, addr: Tuple[str, int], window: Optional[int] = None) -> int:
+        if window is None:
+            window = int(time.time() // CONNECTION_ID_WINDOW)
+        # Bound to the client IP only, so a new source port (NAT, new socket) keeps it valid
+        message = f"{addr[0]}:{window}".encode()
+        digest = hmac.new(self.secret, message, hashlib.sha1).digest()
+        return struct.unpack('!Q', digest[:8])[0]
+
+    def _valid_connection_id(self, connection_id: int, addr: Tuple[str, int]) -> bool:
+        window = int(time.time() // CONNECTION_ID_WINDOW)
+        return connection_id in (self._connection_id(addr, window), self._connection_id(addr, window - 1))
+
+    @staticmethod
+    def _error(transaction_id: int, message: str) -> bytes:
+        return struct.pack('!II', ACTION_ERROR, transaction_id) + message.encode()
+
+class UDPTracker:
+    """Runs the UDP tracker listener on the application event loop"""
+
+    def __init__(self):
+        self.transport: Optional[asyncio.DatagramTransport] = None
+
+    async def start(self, host: Optional[str] = None, port: Optional[int] = None):
+        """Start listening for UDP tracker requests"""
+        if self.transport is not None:
+            return
+        host = settings.UDP_TRACKER_HOST if host is None else host
+        port = settings.UDP_TRACKER_PORT if port is None else port
+
+        loop = asyncio.get_running_loop()
+        self.transport, _ = await loop.create_datagram_endpoint(
+            UDPTrackerProtocol, local_addr=(host, port)
+        )
+        host, port = self.transport.get_extra_info('sockname')[:2]
+        print(f"📡 UDP tracker listening on {host}:{port}")
+
+    def stop(self):
+        """Stop the UDP listener"""
+        if self.transport is None:
+            return
+        self.transport.close()
+        self.transport = None
+        print("🛑 UDP tracker stopped")
+
+# Global instance
+udp_tracker = UDPTracker()
@@ -7,6 +7,8 @@ from app.utils.torrent_util import gen_torrent
 from app.core.config import UPLOAD_DIR
 from app.utils.upload_util import gen_unique_name
 from app.models.data_mapping import DataMapping
+from app.services.hashing_pool import hashing_pool
+import asyncio
 import uuid
 import shutil
 
@@ -21,20 +23,40 @@ class UploadService:
         UPLOAD_DIR.mkdir(parents=True, exist_ok=True)
         TORRENT_DIR.mkdir(parents=True, exist_ok=True)
     
-    async def upload_file(self, file: UploadFile = File(...)):
+    async def upload_file(self, file: UploadFile = File(...), wait: bool = True):
         """
         Téléverse un fichier après avoir validé son type MIME,
         puis le sauvegarde sur le disque et genere le fichier torrent.
+        Avec wait=False, retourne aussitôt le job_id à suivre via /api/tracker/upload/jobs/{job_id}.
         """
         validate_file(file)
-        _uuid = self.save_file(file)      
 
-        torrent_path = gen_torrent(file, _uuid)
+        # Place réservée dans le pool avant la copie : file pleine, 503 sans rien écrire
+        job_id = hashing_pool.create_job(file.filename)
+        try:
+            _uuid = self.save_file(file)
+        except Exception as e:
+            hashing_pool.fail_job(job_id, str(getattr(e, 'detail', e)))
+            raise
+
+        # Le hachage tourne sur le pool de workers pour ne pas bloquer la boucle d'événements
+        future = hashing_pool.submit(job_id, gen_torrent, file, _uuid)
+
+        if not wait:
+            return {
+                "message": "Fichier reçu, génération du torrent en cours",
+                "filename": file.filename,
+                "uuid": str(_uuid),
+                "job_id": job_id
+            }
+
+        torrent_path = await asyncio.wrap_future(future)
 
         return {
             "message": "Fichier reçu avec succès",
             "filename": file.filename,
             "uuid": str(_uuid),
+            "job_id": job_id,
             "torrent_file": torrent_path.name 
         }
 
@@ -46,8 +68,15 @@ class UploadService:
         unique_name = gen_unique_name(file, _uuid)
         file_path = UPLOAD_DIR / unique_name
 
-        self.write_file_to_disk(file, file_path)
-        self.save_map_file(str(_uuid), file.filename, unique_name)
+        try:
+            self.write_file_to_disk(file, file_path)
+            self.save_map_file(str(_uuid), file.filename, unique_name)
+        except Exception:
+            # Ni fichier orphelin ni mapping à moitié enregistré
+            self.db.rollback()
+            if file_path.exists():
+                file_path.unlink()
+            raise
 
         return _uuid
     
@@ -1,7 +1,9 @@
 import hashlib
 import random
+import socket
 import string
-from typing import Dict, Any
+import struct
+from typing import Dict, Any, Iterable, List, Tuple
 
 class BitTorrentUtils:
     """Utility functions for BitTorrent protocol"""
@@ -40,6 +42,27 @@ class BitTorrentUtils:
         """Validate peer ID format (20 characters max)"""
         return len(peer_id) <= 20
     
+    @staticmethod
+    def pack_compact_peers(peers: Iterable[Tuple[str, int]]) -> bytes:
+        """Pack (ip, port) pairs as 6-byte compact peer entries, skipping non-IPv4 addresses"""
+        packed = bytearray()
+        for ip, port in peers:
+            try:
+                packed += socket.inet_pton(socket.AF_INET, ip) + struct.pack('!H', port)
+            except (OSError, struct.error):
+                continue
+        return bytes(packed)
+    
+    @staticmethod
+    def unpack_compact_peers(data: bytes) -> List[Tuple[str, int]]:
+        """Unpack 6-byte compact peer entries into (ip, port) pairs"""
+        peers = []
+        for offset in range(0, len(data) - len(data) % 6, 6):
+            ip = socket.inet_ntoa(data[offset:offset + 4])
+            port = struct.unpack('!H', data[offset + 4:offset + 6])[0]
+            peers.append((ip, port))
+        return peers
+    
     @staticmethod
     def format_bytes(bytes_count: int) -> str:
         """Format bytes count to human readable format"""
@@ -0,0 +1,78 @@
+"""
+Content Store
+Keeps each uploaded file once, addressed by a digest of its piece hashes, so
+identical uploads share one copy on disk
+"""
+
+import hashlib
+import os
+import uuid
+from typing import Any, Dict, Optional, Tuple
+
+class ContentStore:
+    """Content-addressed storage for uploads
+
+    uploads/incoming/<uuid>        files being received
+    uploads/objects/<ab>/<digest>  one copy per distinct content
+    uploads/<name>                 hard link to the object, for tools that look files up by name
+    """
+
+    def __init__(self, root: str = "uploads"):
+        self.root = root
+        self.incoming_dir = os.path.join(root, "incoming")
+        self.objects_dir = os.path.join(root, "objects")
+
+    @staticmethod
+    def content_id(piece_length: int, length: int, piece_hashes: bytes) -> str:
+        """Digest identifying a file by its pieces, computed without reading it again"""
+        digest = hashlib.sha256(f"{piece_length}:{length}:".encode())
+        digest.update(piece_hashes)
+        return digest.hexdigest()
+
+    def incoming_path(self) -> str:
+        """Unique path to receive a new upload into"""
+        os.makedirs(self.incoming_dir, exist_ok=True)
+        return os.path.join(self.incoming_dir, uuid.uuid4().hex)
+
+    def object_path(self, content_id: str) -> str:
+        return os.path.join(self.objects_dir, content_id[:2], content_id)
+
+    def commit(self, incoming_path: str, content_id: str) -> Tuple[str, bool]:
+        """Move a received file into the store, returning (object path, deduplicated)
+
+        When the content is already stored the received copy is dropped.
+        """
+        path = self.object_path(content_id)
+        if os.path.exists(path):
+            os.unlink(incoming_path)
+            return path, True
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        os.replace(incoming_path, path)
+        return path, False
+
+    def link_name(self, path: str, name: str) -> Optional[str]:
+        """Hard link an object as uploads/<name> unless that name holds other content"""
+        named_path = os.path.join(self.root, name)
+        if os.path.exists(named_path):
+            return named_path if os.path.samefile(named_path, path) else None
+        try:
+            os.link(path, named_path)
+        except OSError:
+            # No hard links on this filesystem, the object is still found by its digest
+            return None
+        return named_path
+
+    def find(self, name: str, piece_length: int, length: int, piece_hashes: bytes) -> Optional[str]:
+        """Path of a stored file, falling back to uploads/<name> for files stored before the store"""
+        path = self.object_path(self.content_id(piece_length, length, piece_hashes))
+        if os.path.exists(path):
+            return path
+        named_path = os.path.join(self.root, name)
+        return named_path if os.path.exists(named_path) else None
+
+    def find_for_info(self, info: Dict[str, Any]) -> Optional[str]:
+        """Path of the file described by the info section of a .torrent file"""
+        return self.find(info['name'], info['piece length'], info['length'], bytes.fromhex(info['pieces']))
+
+# Global instance
+content_store = ContentStore()
@@ -9,14 +9,17 @@ from typing import Dict, List, Optional
 from app.utils.p2p_protocol import P2PProtocol, MessageType
 from app.utils.piece_manager import PieceManager
 from app.utils.file_manager import FileManager
+from app.utils.udp_tracker_client import UDPTrackerClient
 
 class DownloadManager:
     """Manages file downloads from multiple peers"""
     
-    def __init__(self, torrent_info: Dict, output_path: str, tracker_url: str = "http://localhost:8000"):
+    def __init__(self, torrent_info: Dict, output_path: str, tracker_url: str = "http://localhost:8000",
+                 udp_tracker: Optional[str] = None):
         self.torrent_info = torrent_info
         self.output_path = output_path
         self.tracker_url = tracker_url
+        self.udp_tracker = udp_tracker  # 'host:port' to announce over UDP instead of HTTP
         self.info_hash = torrent_info['info_hash']
         
         # Calculate total pieces correctly - pieces is a hex string, each hash is 40 hex chars (20 bytes)
@@ -283,24 +286,37 @@ class DownloadManager:
                 print(f"🌱 Auto-seeding started for {self.output_path} on port {available_port}")
                 
                 # Register with tracker
-                announce_params = {
-                    'info_hash': info_hash,
-                    'peer_id': peer_id,
-                    'port': available_port,
-                    'uploaded': 0,
-                    'downloaded': sum(len(piece) for piece in self.downloaded_pieces.values()),
-                    'left': 0,
-                    'event': 'completed',
-                    'compact': 0,
-                    'ip': local_ip
-                }
-                
-                response = requests.get(f"{self.tracker_url}/api/tracker/announce", 
-                                      params=announce_params, timeout=10)
-                if response.status_code == 200:
-                    print(f"✅ Registered as seeder with tracker")
+                if self.udp_tracker:
+                    host, port = UDPTrackerClient.parse_address(self.udp_tracker)
+                    UDPTrackerClient(host, port).announce(
+                        info_hash,
+                        peer_id,
+                        available_port,
+                        downloaded=sum(len(piece) for piece in self.downloaded_pieces.values()),
+                        left=0,
+                        event='completed',
+                        ip=local_ip
+                    )
+                    print(f"✅ Registered as seeder with UDP tracker")
                 else:
-                    print(f"❌ Failed to register with tracker: {response.status_code}")
+                    announce_params = {
+                        'info_hash': info_hash,
+                        'peer_id': peer_id,
+                        'port': available_port,
+                        'uploaded': 0,
+                        'downloaded': sum(len(piece) for piece in self.downloaded_pieces.values()),
+                        'left': 0,
+                        'event': 'completed',
+                        'compact': 0,
+                        'ip': local_ip
+                    }
+                    
+                    response = requests.get(f"{self.tracker_url}/api/tracker/announce", 
+                                          params=announce_params, timeout=10)
+                    if response.status_code == 200:
+                        print(f"✅ Registered as seeder with tracker")
+                    else:
+                        print(f"❌ Failed to register with tracker: {response.status_code}")
                     
                 # Clean up temporary torrent file after a delay
                 def cleanup_temp_file():
@@ -0,0 +1,44 @@
+"""
+Peer Locality
+Groups peer addresses by network proximity so announces can prefer nearby peers
+"""
+
+import ipaddress
+from functools import lru_cache
+from typing import List, Optional, Tuple
+
+from app.core.config import settings
+
+IPV6_SUBNET_PREFIX = 64  # IPv6 addresses are grouped per /64, PEER_LOCALITY_PREFIX is IPv4 only
+
+def locality_key(ip_address: str) -> Optional[str]:
+    """Name of the locality group of an address under PEER_LOCALITY, None when it is off"""
+    mode = settings.PEER_LOCALITY
+    if mode == "off":
+        return None
+    sites = ()
+    if mode == "site":
+        sites = tuple((name, tuple(cidrs)) for name, cidrs in settings.PEER_LOCALITY_SITES.items())
+    return _locality_key(ip_address, mode, settings.PEER_LOCALITY_PREFIX, sites)
+
+@lru_cache(maxsize=65536)
+def _locality_key(ip_address: str, mode: str, prefix: int, sites: tuple) -> str:
+    if mode == "ip":
+        return ip_address
+    try:
+        address = ipaddress.ip_address(ip_address)
+    except ValueError:
+        # Not an IP literal: only the exact same address is local
+        return ip_address
+
+    # Site mode: the configured site containing the address, else its subnet
+    for name, networks in _site_networks(sites):
+        if any(address in network for network in networks):
+            return f"site:{name}"
+
+    subnet_prefix = prefix if address.version == 4 else IPV6_SUBNET_PREFIX
+    return str(ipaddress.ip_network(f"{address}/{subnet_prefix}", strict=False))
+
+@lru_cache(maxsize=16)
+def _site_networks(sites: tuple) -> List[Tuple[str, list]]:
+    return [(name, [ipaddress.ip_network(cidr, strict=False) for cidr in cidrs]) for name, cidrs in sites]
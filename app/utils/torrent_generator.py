@@ -1,8 +1,41 @@
 import hashlib
 import os
 import json
+import time
 from typing import Dict, Any, List
 
+class PieceHasher:
+    """Computes piece SHA-1s incrementally from data fed in chunks of any size"""
+    
+    def __init__(self, piece_length: int):
+        self.piece_length = piece_length
+        self.piece_hashes: List[bytes] = []
+        self.length = 0  # Total bytes fed
+        self._current = hashlib.sha1()
+        self._current_size = 0  # Bytes in the piece being hashed
+    
+    def update(self, data: bytes):
+        """Feed the next chunk of the file"""
+        self.length += len(data)
+        view = memoryview(data)
+        while view:
+            take = min(len(view), self.piece_length - self._current_size)
+            self._current.update(view[:take])
+            self._current_size += take
+            view = view[take:]
+            if self._current_size == self.piece_length:
+                self.piece_hashes.append(self._current.digest())
+                self._current = hashlib.sha1()
+                self._current_size = 0
+    
+    def finish(self) -> List[bytes]:
+        """Hash the trailing partial piece and return all piece hashes"""
+        if self._current_size:
+            self.piece_hashes.append(self._current.digest())
+            self._current = hashlib.sha1()
+            self._current_size = 0
+        return self.piece_hashes
+
 class TorrentGenerator:
     """Handles torrent file generation and metadata creation"""
     
@@ -38,11 +71,23 @@ class TorrentGenerator:
         if not os.path.exists(file_path):
             raise FileNotFoundError(f"File not found: {file_path}")
         
-        file_size = os.path.getsize(file_path)
-        file_name = os.path.basename(file_path)
-        
         # Calculate piece hashes
         piece_hashes = cls.calculate_piece_hashes(file_path, piece_length)
+        
+        return cls.build_torrent_metadata(
+            os.path.basename(file_path),
+            os.path.getsize(file_path),
+            piece_hashes,
+            tracker_url,
+            piece_length,
+            int(os.path.getctime(file_path))
+        )
+    
+    @classmethod
+    def build_torrent_metadata(cls, file_name: str, file_size: int, piece_hashes: List[bytes],
+                               tracker_url: str, piece_length: int = DEFAULT_PIECE_LENGTH,
+                               creation_date: int = None) -> Dict[str, Any]:
+        """Create torrent metadata from piece hashes that were already computed"""
         pieces_hash = b''.join(piece_hashes)
         
         # Create info section
@@ -61,7 +106,7 @@ class TorrentGenerator:
             'announce': tracker_url,
             'info': info,
             'info_hash': info_hash,
-            'creation date': int(os.path.getctime(file_path)),
+            'creation date': creation_date if creation_date is not None else int(time.time()),
             'created by': 'P2P-BitTorrent-Python',
             'comment': f'Generated torrent for {file_name}'
         }
@@ -86,11 +131,16 @@ class TorrentGenerator:
         output_dir = os.path.dirname(torrent_filename) if os.path.dirname(torrent_filename) else '.'
         os.makedirs(output_dir, exist_ok=True)
         
-        with open(torrent_filename, 'w', encoding='utf-8') as f:
-            json.dump(torrent_data, f, indent=2, ensure_ascii=False)
+        with open(torrent_filename, 'wb') as f:
+            f.write(TorrentGenerator.serialize_torrent(torrent_data))
         
         return torrent_filename
     
+    @staticmethod
+    def serialize_torrent(torrent_data: Dict[str, Any]) -> bytes:
+        """Serialize torrent metadata to the bytes of a .torrent file (JSON format)"""
+        return json.dumps(torrent_data, indent=2, ensure_ascii=False).encode('utf-8')
+    
     @staticmethod
     def load_torrent_file(torrent_path: str) -> Dict[str, Any]:
         """Load torrent metadata from a .torrent file"""
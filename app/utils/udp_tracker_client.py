@@ -0,0 +1,118 @@
+import random
+import socket
+import struct
+import time
+from typing import Dict, List, Optional, Tuple
+
+from app.utils.bittorrent import BitTorrentUtils
+
+class UDPTrackerClient:
+    """Client for the BEP 15 style UDP tracker protocol"""
+
+    PROTOCOL_ID = 0x41727101980
+    ACTION_CONNECT = 0
+    ACTION_ANNOUNCE = 1
+    ACTION_SCRAPE = 2
+    ACTION_ERROR = 3
+    EVENTS = {None: 0, "completed": 1, "started": 2, "stopped": 3}
+    CONNECTION_ID_LIFETIME = 60  # Seconds before a new connect is done
+
+    def __init__(self, host: str, port: int, timeout: float = 5.0, retries: int = 2):
+        self.address = (host, port)
+        self.timeout = timeout
+        self.retries = retries
+        self.connection_id: Optional[int] = None
+        self.connected_at = 0.0
+
+    @staticmethod
+    def parse_address(address: str) -> Tuple[str, int]:
+        """Parse 'host:port' or 'udp://host:port' into a (host, port) tuple"""
+        if address.startswith("udp://"):
+            address = address[len("udp://"):]
+        host, _, port = address.rstrip("/").rpartition(":")
+        return host, int(port)
+
+    def announce(self, info_hash: str, peer_id: str, port: int, uploaded: int = 0,
+                 downloaded: int = 0, left: int = 0, event: Optional[str] = None,
+                 numwant: int = -1, ip: Optional[str] = None) -> Dict:
+        """Announce to the tracker and return interval, seeders, leechers and peers"""
+        transaction_id = random.getrandbits(32)
+        request = struct.pack(
+            '!QII20s20sQQQI4sIiH',
+            self._get_connection_id(),
+            self.ACTION_ANNOUNCE,
+            transaction_id,
+            bytes.fromhex(info_hash),
+            peer_id.encode('latin-1')[:20].ljust(20, b'\x00'),
+            downloaded,
+            left,
+            uploaded,
+            self.EVENTS.get(event, 0),
+            socket.inet_aton(ip) if ip else b'\x00\x00\x00\x00',
+            random.getrandbits(32),
+            numwant,
+            port
+        )
+
+        response = self._request(request, transaction_id, self.ACTION_ANNOUNCE)
+        interval, leechers, seeders = struct.unpack('!III', response[8:20])
+
+        return {
+            'interval': interval,
+            'seeders': seeders,
+            'leechers': leechers,
+            'peers': [
+                {'ip_address': peer_ip, 'port': peer_port}
+                for peer_ip, peer_port in BitTorrentUtils.unpack_compact_peers(response[20:])
+            ]
+        }
+
+    def scrape(self, info_hashes: List[str]) -> Dict[str, Dict[str, int]]:
+        """Scrape seeder, leecher and completed counts for several torrents"""
+        transaction_id = random.getrandbits(32)
+        request = struct.pack('!QII', self._get_connection_id(), self.ACTION_SCRAPE, transaction_id)
+        request += b''.join(bytes.fromhex(info_hash) for info_hash in info_hashes)
+
+        response = self._request(request, transaction_id, self.ACTION_SCRAPE)
+
+        files = {}
+        for index, info_hash in enumerate(info_hashes):
+            offset = 8 + index * 12
+            seeders, completed, leechers = struct.unpack('!III', response[offset:offset + 12])
+            files[info_hash] = {'complete': seeders, 'downloaded': completed, 'incomplete': leechers}
+        return files
+
+    def _get_connection_id(self) -> int:
+        """Reuse the connection ID while it is fresh, otherwise connect again"""
+        if self.connection_id is None or time.time() - self.connected_at > self.CONNECTION_ID_LIFETIME:
+            transaction_id = random.getrandbits(32)
+            request = struct.pack('!QII', self.PROTOCOL_ID, self.ACTION_CONNECT, transaction_id)
+            response = self._request(request, transaction_id, self.ACTION_CONNECT)
+            self.connection_id = struct.unpack('!Q', response[8:16])[0]
+            self.connected_at = time.time()
+        return self.connection_id
+
+    def _request(self, request: bytes, transaction_id: int, action: int) -> bytes:
+        """Send a request and wait for the matching response, retrying on timeout"""
+        with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as sock:
+            sock.settimeout(self.timeout)
+            for attempt in range(self.retries + 1):
+                sock.sendto(request, self.address)
+                try:
+                    while True:
+                        response, _ = sock.recvfrom(65536)
+                        if len(response) < 8:
+                            continue
+                        response_action, response_transaction = struct.unpack('!II', response[:8])
+                        if response_transaction != transaction_id:
+                            continue
+                        if response_action == self.ACTION_ERROR:
+                            self.connection_id = None
+                            raise ConnectionError(f"Tracker error: {response[8:].decode(errors='replace')}")
+                        if response_action != action:
+                            raise ConnectionError(f"Unexpected tracker action {response_action}")
+                        return response
+                except socket.timeout:
+                    continue
+
+        raise TimeoutError(f"No response from UDP tracker {self.address[0]}:{self.address[1]}")
@@ -0,0 +1,344 @@
+#!/usr/bin/env python3
+"""
+Tracker Benchmark - Drive synthetic announce, scrape and peer-list traffic at the
+tracker and report throughput and latency percentiles as JSON
+
+By default a throwaway tracker is started on loopback with its own temporary
+database; pass --url to measure a tracker that is already running.
+"""
+
+import argparse
+import json
+import math
+import os
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import requests
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional
+
+# Add parent directory to path to import our modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.utils.bittorrent import BitTorrentUtils
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+OPERATIONS = ("announce", "scrape", "peers")
+SETUP_BATCH_SIZE = 1000  # Peers registered per batch announce during setup
+FILE_SIZE = 100 * 1024 * 1024  # Size of every synthetic torrent
+PIECE_LENGTH = 2**18
+
+def parse_mix(mix: str) -> Dict[str, float]:
+    """Parse an event mix such as 'announce=80,scrape=15,peers=5' into weights"""
+    weights = {}
+    for part in mix.split(","):
+        name, _, weight = part.partition("=")
+        name = name.strip()
+        if name not in OPERATIONS:
+            raise argparse.ArgumentTypeError(f"Unknown operation {name!r}, expected one of {', '.join(OPERATIONS)}")
+        try:
+            weights[name] = float(weight)
+        except ValueError:
+            raise argparse.ArgumentTypeError(f"Invalid weight for {name}: {weight!r}")
+    if sum(weights.values()) <= 0:
+        raise argparse.ArgumentTypeError("The mix needs at least one positive weight")
+    return weights
+
+def percentile(sorted_values: List[float], pct: float) -> float:
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, math.ceil(pct / 100 * len(sorted_values)))
+    return sorted_values[rank - 1]
+
+def summarize(latencies: List[float], errors: int, elapsed: float) -> Dict:
+    """Throughput and latency distribution (milliseconds) of one operation"""
+    ordered = sorted(latencies)
+    return {
+        'requests': len(ordered),
+        'errors': errors,
+        'throughput_rps': round(len(ordered) / elapsed, 2) if elapsed > 0 else 0.0,
+        'latency_ms': {
+            'p50': round(percentile(ordered, 50), 3),
+            'p95': round(percentile(ordered, 95), 3),
+            'p99': round(percentile(ordered, 99), 3),
+            'mean': round(sum(ordered) / len(ordered), 3) if ordered else 0.0,
+            'max': round(ordered[-1], 3) if ordered else 0.0
+        }
+    }
+
+class LocalTracker:
+    """Tracker process on loopback with a temporary database, for isolated runs"""
+
+    def __init__(self, min_interval: int):
+        self.min_interval = min_interval
+        self.data_dir = tempfile.TemporaryDirectory(prefix="tracker-bench-")
+        self.process: Optional[subprocess.Popen] = None
+        self.url = None
+
+    def start(self, timeout: float = 30) -> str:
+        with socket.socket() as s:
+            s.bind(("127.0.0.1", 0))
+            port = s.getsockname()[1]
+
+        db_path = os.path.join(self.data_dir.name, "bench.db")
+        env = dict(
+            os.environ,
+            DATABASE_URL=f"sqlite:///{db_path}",
+            ASYNC_DATABASE_URL=f"sqlite+aiosqlite:///{db_path}",
+            UDP_TRACKER_ENABLED="false",
+            ANNOUNCE_MIN_INTERVAL=str(self.min_interval)
+        )
+        self.process = subprocess.Popen(
+            [sys.executable, "-m", "uvicorn", "app.main:app", "--host", "127.0.0.1",
+             "--port", str(port), "--log-level", "warning"],
+            cwd=PROJECT_ROOT, env=env,
+            stdout=sys.stderr  # Keep the tracker's own output out of the JSON report
+        )
+
+        self.url = f"http://127.0.0.1:{port}"
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            if self.process.poll() is not None:
+                raise RuntimeError(f"Tracker exited during startup with code {self.process.returncode}")
+            try:
+                if requests.get(f"{self.url}/health", timeout=1).status_code == 200:
+                    return self.url
+            except requests.RequestException:
+                pass
+            time.sleep(0.2)
+        self.stop()
+        raise RuntimeError("Tracker did not become healthy in time")
+
+    def stop(self):
+        if self.process is not None and self.process.poll() is None:
+            self.process.terminate()
+            try:
+                self.process.wait(timeout=10)
+            except subprocess.TimeoutExpired:
+                self.process.kill()
+        self.data_dir.cleanup()
+
+class TrackerBenchmark:
+    """Synthetic swarms and the client threads that load them"""
+
+    def __init__(self, tracker_url: str, args: argparse.Namespace):
+        self.api = f"{tracker_url}/api/tracker"
+        self.args = args
+        self.mix = args.mix
+        self.random = random.Random(args.seed)
+        self.swarms: Dict[str, List[Dict]] = {}  # info_hash -> peers the benchmark announced
+        self.lock = threading.Lock()
+        self.local = threading.local()
+        self.latencies = {name: [] for name in OPERATIONS}
+        self.errors = {name: 0 for name in OPERATIONS}
+
+    def _session(self) -> requests.Session:
+        if not hasattr(self.local, "session"):
+            self.local.session = requests.Session()
+        return self.local.session
+
+    def _new_peer(self) -> Dict:
+        seeder = self.random.random() < self.args.seed_ratio
+        return {
+            'peer_id': BitTorrentUtils.generate_peer_id(),
+            'ip': f"10.{self.random.randrange(256)}.{self.random.randrange(256)}.{self.random.randrange(1, 255)}",
+            'port': self.random.randrange(1024, 65536),
+            'left': 0 if seeder else self.random.randrange(1, FILE_SIZE)
+        }
+
+    def setup(self):
+        """Create the torrents and fill their swarms"""
+        session = self._session()
+        for i in range(self.args.torrents):
+            info_hash = "%040x" % self.random.getrandbits(160)
+            response = session.post(f"{self.api}/torrents", json={
+                'name': f"bench-{i}.bin",
+                'file_size': FILE_SIZE,
+                'piece_length': PIECE_LENGTH,
+                'info_hash': info_hash,
+                'num_pieces': FILE_SIZE // PIECE_LENGTH,
+                'pieces_hash': "0" * 20
+            }, timeout=30)
+            response.raise_for_status()
+            self.swarms[info_hash] = [self._new_peer() for _ in range(self.args.swarm_size)]
+
+        announces = [
+            self._announce_params(info_hash, peer, 'started')
+            for info_hash, peers in self.swarms.items() for peer in peers
+        ]
+        for start in range(0, len(announces), SETUP_BATCH_SIZE):
+            response = session.post(
+                f"{self.api}/announce/batch",
+                json={'announces': announces[start:start + SETUP_BATCH_SIZE]},
+                timeout=60
+            )
+            response.raise_for_status()
+
+    def _announce_params(self, info_hash: str, peer: Dict, event: Optional[str]) -> Dict:
+        params = {
+            'info_hash': info_hash,
+            'peer_id': peer['peer_id'],
+            'ip': peer['ip'],
+            'port': peer['port'],
+            'downloaded': FILE_SIZE - peer['left'],
+            'left': peer['left']
+        }
+        if event:
+            params['event'] = event
+        return params
+
+    def _pick_operation(self) -> str:
+        with self.lock:
+            return self.random.choices(list(self.mix), weights=list(self.mix.values()))[0]
+
+    def _announce(self) -> List[Dict]:
+        """Requests for one announce: a regular update, a completion, or churn"""
+        with self.lock:
+            info_hash = self.random.choice(list(self.swarms))
+            peers = self.swarms[info_hash]
+            slot = self.random.randrange(len(peers))
+            peer = peers[slot]
+            roll = self.random.random()
+            if roll < self.args.churn:
+                # The peer leaves and a new one takes its place
+                replacement = self._new_peer()
+                peers[slot] = replacement
+                return [self._announce_params(info_hash, peer, 'stopped'),
+                        self._announce_params(info_hash, replacement, 'started')]
+            if peer['left'] and roll < self.args.churn + self.args.complete_ratio:
+                peer['left'] = 0
+                return [self._announce_params(info_hash, peer, 'completed')]
+            return [self._announce_params(info_hash, peer, None)]
+
+    def _timed(self, operation: str, method: str, url: str, **kwargs):
+        start = time.perf_counter()
+        try:
+            response = self._session().request(method, url, timeout=30, **kwargs)
+            ok = response.status_code == 200
+        except requests.RequestException:
+            ok = False
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        with self.lock:
+            if ok:
+                self.latencies[operation].append(elapsed_ms)
+            else:
+                self.errors[operation] += 1
+
+    def _run_one(self):
+        operation = self._pick_operation()
+        if operation == "announce":
+            for params in self._announce():
+                params['numwant'] = self.args.numwant
+                params['compact'] = 1 if self.args.compact else 0
+                self._timed("announce", "GET", f"{self.api}/announce", params=params)
+        elif operation == "scrape":
+            with self.lock:
+                hashes = self.random.sample(list(self.swarms), min(self.args.scrape_hashes, len(self.swarms)))
+            self._timed("scrape", "GET", f"{self.api}/scrape", params=[('info_hash', h) for h in hashes])
+        else:
+            with self.lock:
+                info_hash = self.random.choice(list(self.swarms))
+            self._timed("peers", "GET", f"{self.api}/peers/{info_hash}")
+
+    def _worker(self, deadline: float, remaining: List[int]):
+        while time.monotonic() < deadline:
+            with self.lock:
+                if remaining[0] <= 0:
+                    return
+                remaining[0] -= 1
+            self._run_one()
+
+    def run(self) -> Dict:
+        """Load the tracker for the configured duration or request count"""
+        deadline = time.monotonic() + (self.args.duration if self.args.duration else float("inf"))
+        remaining = [self.args.requests if self.args.requests else float("inf")]
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=self.args.concurrency) as pool:
+            for future in [pool.submit(self._worker, deadline, remaining) for _ in range(self.args.concurrency)]:
+                future.result()
+        elapsed = time.perf_counter() - started
+
+        all_latencies = [value for values in self.latencies.values() for value in values]
+        return {
+            'config': {
+                'torrents': self.args.torrents,
+                'swarm_size': self.args.swarm_size,
+                'seed_ratio': self.args.seed_ratio,
+                'churn': self.args.churn,
+                'complete_ratio': self.args.complete_ratio,
+                'mix': self.mix,
+                'concurrency': self.args.concurrency,
+                'numwant': self.args.numwant,
+                'compact': self.args.compact,
+                'min_interval': None if self.args.url else self.args.min_interval,
+                'seed': self.args.seed
+            },
+            'elapsed_s': round(elapsed, 3),
+            'total': summarize(all_latencies, sum(self.errors.values()), elapsed),
+            'operations': {
+                name: summarize(self.latencies[name], self.errors[name], elapsed)
+                for name in OPERATIONS if name in self.mix
+            }
+        }
+
+def main():
+    parser = argparse.ArgumentParser(description="Load-test the tracker and report throughput and latency as JSON")
+    parser.add_argument("--url", default=None,
+                        help="Tracker to load, e.g. http://localhost:8000 (default: start one on loopback)")
+    parser.add_argument("--torrents", type=int, default=10, help="Number of synthetic torrents")
+    parser.add_argument("--swarm-size", type=int, default=100, help="Peers per torrent")
+    parser.add_argument("--seed-ratio", type=float, default=0.2, help="Fraction of peers that are seeders")
+    parser.add_argument("--churn", type=float, default=0.05,
+                        help="Fraction of announces where the peer leaves and a new one joins")
+    parser.add_argument("--complete-ratio", type=float, default=0.02,
+                        help="Fraction of leecher announces that complete the download")
+    parser.add_argument("--mix", type=parse_mix, default=parse_mix("announce=80,scrape=15,peers=5"),
+                        help="Operation weights (default: announce=80,scrape=15,peers=5)")
+    parser.add_argument("--scrape-hashes", type=int, default=5, help="Info hashes per scrape")
+    parser.add_argument("--numwant", type=int, default=50, help="Peers requested per announce")
+    parser.add_argument("--compact", action="store_true", help="Request compact peer lists")
+    parser.add_argument("--concurrency", type=int, default=8, help="Concurrent client threads")
+    parser.add_argument("--duration", type=float, default=10, help="Seconds to run (0 to rely on --requests)")
+    parser.add_argument("--requests", type=int, default=0, help="Stop after this many operations (0 for no limit)")
+    parser.add_argument("--min-interval", type=int, default=0,
+                        help="ANNOUNCE_MIN_INTERVAL of the local tracker; 0 makes every announce do full work")
+    parser.add_argument("--seed", type=int, default=None, help="Random seed for a repeatable workload")
+    parser.add_argument("-o", "--output", default=None, help="Write the JSON report to this file")
+    args = parser.parse_args()
+
+    if not args.duration and not args.requests:
+        parser.error("Set --duration or --requests")
+
+    local_tracker = None
+    tracker_url = args.url
+    if tracker_url is None:
+        local_tracker = LocalTracker(args.min_interval)
+        tracker_url = local_tracker.start()
+
+    try:
+        benchmark = TrackerBenchmark(tracker_url.rstrip("/"), args)
+        print(f"📡 Creating {args.torrents} torrents with {args.swarm_size} peers each...", file=sys.stderr)
+        benchmark.setup()
+        print(f"🚀 Running benchmark against {tracker_url}...", file=sys.stderr)
+        report = benchmark.run()
+    finally:
+        if local_tracker is not None:
+            local_tracker.stop()
+
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(output + "\n")
+        print(f"✅ Report written to {args.output}", file=sys.stderr)
+    else:
+        print(output)
+
+if __name__ == "__main__":
+    main()
@@ -19,12 +19,14 @@ from app.utils.torrent_generator import TorrentGenerator
 from app.utils.download_manager import DownloadManager
 from app.utils.bittorrent import BitTorrentUtils
 from app.utils.file_manager import FileManager
+from app.utils.udp_tracker_client import UDPTrackerClient
 
 class P2PClient:
     """Simple P2P BitTorrent-like client"""
     
-    def __init__(self, tracker_url: str = "http://localhost:8000/api/tracker"):
+    def __init__(self, tracker_url: str = "http://localhost:8000/api/tracker", udp_tracker: Optional[str] = None):
         self.tracker_url = tracker_url
+        self.udp_tracker = udp_tracker  # 'host:port' to announce over UDP instead of HTTP
         self.peer_id = BitTorrentUtils.generate_peer_id()
         self.port = 6881  # Default BitTorrent port
         self.downloads: Dict[str, DownloadManager] = {}
@@ -119,13 +121,13 @@ class P2PClient:
             print(f"Found {len(peers)} peers")
             
             # Start download manager
-            download_manager = DownloadManager(torrent_data, output_path)
+            download_manager = DownloadManager(torrent_data, output_path, udp_tracker=self.udp_tracker)
             self.downloads[info_hash] = download_manager
             
             # Add peers
             for peer in peers[:5]:  # Limit to 5 peers for MVP
                 print(f"Connecting to peer: {peer['ip_address']}:{peer['port']}")
-                download_manager.add_peer(peer['peer_id'], peer['ip_address'], peer['port'])
+                download_manager.add_peer(peer.get('peer_id', self.peer_id), peer['ip_address'], peer['port'])
             
             # Start download
             download_manager.start_download()
@@ -139,6 +141,18 @@ class P2PClient:
     def _get_peers_from_tracker(self, info_hash: str) -> List[Dict]:
         """Get peer list from tracker"""
         try:
+            if self.udp_tracker:
+                # Compact UDP announce, peers come back without peer IDs
+                host, port = UDPTrackerClient.parse_address(self.udp_tracker)
+                result = UDPTrackerClient(host, port).announce(
+                    info_hash,
+                    self.peer_id,
+                    self.port,
+                    left=1000000,  # Placeholder
+                    event='started'
+                )
+                return result['peers']
+            
             # Announce to tracker
             announce_url = f"{self.tracker_url}/announce"
             params = {
@@ -211,6 +225,8 @@ def main():
     parser = argparse.ArgumentParser(description="P2P BitTorrent-like Client")
     parser.add_argument("--tracker", default="http://localhost:8000/api/tracker", 
                        help="Tracker URL")
+    parser.add_argument("--udp-tracker", default=None,
+                       help="Announce over UDP to this tracker (host:port), e.g. localhost:6969")
     
     subparsers = parser.add_subparsers(dest="command", help="Available commands")
     
@@ -233,7 +249,7 @@ def main():
         parser.print_help()
         return
     
-    client = P2PClient(args.tracker)
+    client = P2PClient(args.tracker, args.udp_tracker)
     
     if args.command == "create":
         if not os.path.exists(args.file):
@@ -28,6 +28,7 @@ class P2PSeederServer:
         self.running = False
         self.server_socket = None
         self.clients = []
+        self.bytes_served = 0  # Piece bytes sent to peers
         
         # Load torrent data
         self.torrent_data = TorrentGenerator.load_torrent_file(torrent_file_path)
@@ -194,6 +195,7 @@ class P2PSeederServer:
                                                       offset, 
                                                       chunk)
                                 client_socket.send(piece_msg)
+                                self.bytes_served += len(chunk)
                                 print(f"✅ Sent piece {piece_index} chunk ({len(chunk)} bytes) to {client_address}")
                             else:
                                 print(f"❌ Invalid offset {offset} for piece {piece_index}")
@@ -6,8 +6,6 @@ Register P2P Servers - Register running P2P servers as peers in the tracker
 import os
 import sys
 import requests
-import threading
-import time
 
 # Add parent directory to path to import our modules
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -15,48 +13,51 @@ sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 from app.utils.torrent_generator import TorrentGenerator
 from app.utils.bittorrent import BitTorrentUtils
 
-def register_seeder_with_tracker(torrent_path: str, port: int, tracker_url: str = "http://localhost:8000"):
-    """Register a running P2P seeder with the tracker"""
-    try:
-        # Load torrent data
-        torrent_data = TorrentGenerator.load_torrent_file(torrent_path)
-        info_hash = torrent_data['info_hash']
-        file_name = torrent_data['info']['name']
-        file_size = torrent_data['info']['length']
-        
-        print(f"📡 Registering {file_name} on port {port}")
-        
-        # Generate peer ID
-        peer_id = BitTorrentUtils.generate_peer_id()
-        
-        # Register as completed seeder
-        announce_params = {
-            'info_hash': info_hash,
-            'peer_id': peer_id,
-            'port': port,  # Use the actual P2P server port
-            'uploaded': file_size,
-            'downloaded': file_size,
-            'left': 0,
-            'event': 'completed',
-            'compact': 0
-        }
-        
-        response = requests.get(
-            f"{tracker_url}/api/tracker/announce",
-            params=announce_params,
-            timeout=10
-        )
-        
-        if response.status_code == 200:
-            print(f"✅ Registered {file_name} as seeder on port {port}")
-            return True
-        else:
-            print(f"❌ Failed to register {file_name}: {response.text}")
-            return False
+BATCH_SIZE = 1000  # Seeders announced per batch request
+
+def build_seeder_announce(torrent_path: str, port: int) -> dict:
+    """Build the completed-seeder announce for a running P2P seeder"""
+    # Load torrent data
+    torrent_data = TorrentGenerator.load_torrent_file(torrent_path)
+    file_size = torrent_data['info']['length']
+    
+    print(f"📡 Registering {torrent_data['info']['name']} on port {port}")
+    
+    # Register as completed seeder
+    return {
+        'info_hash': torrent_data['info_hash'],
+        'peer_id': BitTorrentUtils.generate_peer_id(),
+        'port': port,  # Use the actual P2P server port
+        'uploaded': file_size,
+        'downloaded': file_size,
+        'left': 0,
+        'event': 'completed'
+    }
+
+def register_seeders_with_tracker(announces: list, tracker_url: str = "http://localhost:8000") -> int:
+    """Register seeders with the tracker in batch requests, returning how many were accepted"""
+    accepted = 0
+    for start in range(0, len(announces), BATCH_SIZE):
+        chunk = announces[start:start + BATCH_SIZE]
+        try:
+            response = requests.post(
+                f"{tracker_url}/api/tracker/announce/batch",
+                json={'announces': chunk},
+                timeout=30
+            )
             
-    except Exception as e:
-        print(f"❌ Error registering {torrent_path}: {e}")
-        return False
+            if response.status_code == 200:
+                result = response.json()
+                accepted += result['accepted']
+                for info_hash, reason in result['failed'].items():
+                    print(f"❌ Failed to register {info_hash[:8]}: {reason}")
+            else:
+                print(f"❌ Failed to register batch: {response.text}")
+                
+        except Exception as e:
+            print(f"❌ Error registering batch: {e}")
+    
+    return accepted
 
 def main():
     """Register all P2P servers that should be running"""
@@ -72,15 +73,15 @@ def main():
     
     torrent_files = [f for f in os.listdir(torrents_dir) if f.endswith('.torrent')]
     
-    successful = 0
+    announces = []
     for i, torrent_file in enumerate(torrent_files):
         torrent_path = os.path.join(torrents_dir, torrent_file)
-        port = base_port + i
-        
-        if register_seeder_with_tracker(torrent_path, port):
-            successful += 1
-        
-        time.sleep(0.5)  # Small delay between registrations
+        try:
+            announces.append(build_seeder_announce(torrent_path, base_port + i))
+        except Exception as e:
+            print(f"❌ Error loading {torrent_path}: {e}")
+    
+    successful = register_seeders_with_tracker(announces)
     
     print(f"\n📊 Summary:")
     print(f"Total torrents: {len(torrent_files)}")
@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+"""
+Test the async tracker service used by the announce, peers and stats endpoints,
+and the UDP tracker listener that shares its swarms
+"""
+
+import sys
+import os
+import asyncio
+
+# Add the project root to Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.db import init_db
+from app.db.session import SessionLocal, AsyncSessionLocal, async_engine
+from app.services.tracker_service import TrackerService, AsyncTrackerService
+from app.services.swarm_registry import swarm_registry
+from app.services.tracker_stats import EMPTY_TOTALS, TrackerStats, tracker_stats
+from app.services.udp_tracker import UDPTracker
+from app.utils.udp_tracker_client import UDPTrackerClient
+from app.schemas.torrent import TorrentAnnounceRequest
+from tests.test_swarm_registry import create_test_torrent
+
+async def run_async_announces(info_hash: str, batch_hashes: list):
+    try:
+        async with AsyncSessionLocal() as db:
+            tracker_service = AsyncTrackerService(db)
+
+            print("Step 1: Announcing through the async service...")
+            for i in range(3):
+                response = await tracker_service.announce(TorrentAnnounceRequest(
+                    info_hash=info_hash,
+                    peer_id=f"ASYNC{i}{info_hash[:8]}",
+                    port=7200 + i,
+                    left=i
+                ), "10.0.1.1")
+            assert len(response.peers) == 2
+            print("✓ Async announces answered")
+
+            print("Step 2: Reading peers and stats...")
+            swarm_registry.flush()
+            peers = await tracker_service.get_peers(info_hash)
+            assert len(peers) == 3
+            tracker_stats.refresh()
+            stats = await tracker_service.get_tracker_stats()
+            assert stats['active_peers'] >= 3
+            torrent = await tracker_service.get_torrent(info_hash)
+            assert (torrent.seeders, torrent.leechers) == (1, 2)
+            torrent_stats = await tracker_service.get_torrent_stats(info_hash)
+            assert (torrent_stats['seeders'], torrent_stats['leechers']) == (1, 2)
+            print("✓ Peers and stats read asynchronously")
+
+            print("Step 3: Reading the per-torrent rollup of an unloaded swarm...")
+            swarm_registry.clear()
+            tracker_stats.refresh()
+            rollup = tracker_stats.get_torrent(info_hash)
+            assert (rollup['seeders'], rollup['leechers'], rollup['active_peers']) == (1, 2, 3)
+            cold_stats = TrackerStats()
+            assert cold_stats.get_totals() == EMPTY_TOTALS  # Served at once, refresh runs aside
+            cold_stats.refresh_thread.join(timeout=5)
+            assert cold_stats.get_totals()['active_peers'] >= 3
+            print("✓ Rollup computed from the database snapshot, never on the request")
+
+            print("Step 4: Scraping known and unknown hashes...")
+            scrape = await tracker_service.scrape([info_hash, "0" * 40])
+            assert list(scrape.files) == [info_hash]
+            assert (scrape.files[info_hash].complete, scrape.files[info_hash].incomplete) == (1, 2)
+            print("✓ Scrape served from swarm counters")
+
+        print("Step 5: Registering a seeder for many torrents in one batch...")
+        async with AsyncSessionLocal() as db:
+            info_hashes = [info_hash] + batch_hashes
+            response = await AsyncTrackerService(db).announce_batch([
+                TorrentAnnounceRequest(info_hash=h, peer_id=f"BATCH{h[:15]}", port=7600, left=0, event="completed")
+                for h in info_hashes + ["0" * 40]
+            ], "10.0.2.1")
+        assert response.accepted == 3 and list(response.failed) == ["0" * 40]
+        swarm_registry.flush()
+        for h in info_hashes:
+            assert swarm_registry.swarms[h].peers[f"BATCH{h[:15]}"].id is not None
+        print("✓ Batch applied and written in one transaction")
+
+        print("Step 6: Announcing and scraping over UDP...")
+        udp_tracker = UDPTracker()
+        await udp_tracker.start(host="127.0.0.1", port=0)
+        try:
+            host, port = udp_tracker.transport.get_extra_info('sockname')[:2]
+            client = UDPTrackerClient(host, port, timeout=2.0)
+            result = await asyncio.to_thread(
+                client.announce, info_hash, f"UDP00{info_hash[:15]}", 7300, left=0, event="started"
+            )
+            assert (result['seeders'], result['leechers']) == (3, 2)
+            assert len(result['peers']) == 2  # A seeder is only handed the leechers
+            files = await asyncio.to_thread(client.scrape, [info_hash])
+            assert files[info_hash]['complete'] == 3
+        finally:
+            udp_tracker.stop()
+        print("✓ UDP tracker shares the swarm with HTTP announces")
+    finally:
+        # Close pooled aiosqlite connections so their worker threads exit
+        await async_engine.dispose()
+
+def test_async_tracker():
+    """Announce, peer list and stats work through AsyncTrackerService"""
+    init_db()
+    db = SessionLocal()
+    try:
+        tracker_service = TrackerService(db)
+        info_hash = create_test_torrent(tracker_service)
+        batch_hashes = [create_test_torrent(tracker_service) for _ in range(2)]
+    finally:
+        db.close()
+
+    asyncio.run(run_async_announces(info_hash, batch_hashes))
+
+if __name__ == "__main__":
+    test_async_tracker()
+    print("\n🎉 Async tracker tests passed!")
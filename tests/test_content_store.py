@@ -0,0 +1,60 @@
+#!/usr/bin/env python3
+"""
+Test content-addressed upload storage and deduplication
+"""
+
+import sys
+import os
+import tempfile
+
+# Add the project root to Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.utils.content_store import ContentStore
+from app.utils.torrent_generator import PieceHasher, TorrentGenerator
+
+def receive(store: ContentStore, data: bytes):
+    """Write an upload into the store like the upload endpoint does"""
+    incoming_path = store.incoming_path()
+    hasher = PieceHasher(TorrentGenerator.DEFAULT_PIECE_LENGTH)
+    with open(incoming_path, "wb") as f:
+        f.write(data)
+    hasher.update(data)
+    content_id = ContentStore.content_id(TorrentGenerator.DEFAULT_PIECE_LENGTH, hasher.length, b''.join(hasher.finish()))
+    return store.commit(incoming_path, content_id)
+
+def test_content_store():
+    """Identical uploads share one stored copy"""
+    with tempfile.TemporaryDirectory() as root:
+        store = ContentStore(root)
+        data = os.urandom(TorrentGenerator.DEFAULT_PIECE_LENGTH + 1000)
+
+        print("Step 1: Storing the same bytes twice...")
+        first_path, deduplicated = receive(store, data)
+        assert not deduplicated
+        second_path, deduplicated = receive(store, data)
+        assert deduplicated and second_path == first_path
+        assert os.listdir(store.incoming_dir) == []
+        print("✓ Second upload dropped in favour of the stored copy")
+
+        print("Step 2: Linking upload names...")
+        named_path = store.link_name(first_path, "disk.iso")
+        assert os.path.samefile(named_path, first_path)
+        assert store.link_name(first_path, "disk.iso") == named_path
+        other_path, deduplicated = receive(store, os.urandom(1000))
+        assert not deduplicated and other_path != first_path
+        assert store.link_name(other_path, "disk.iso") is None  # Name holds other content
+        print("✓ Names link to their content, never to other content")
+
+        print("Step 3: Finding a file from its torrent info...")
+        torrent_data = TorrentGenerator.create_torrent_metadata(named_path, "http://localhost:8000/api/tracker/announce")
+        assert store.find_for_info(torrent_data['info']) == first_path
+        with open(os.path.join(root, "legacy.bin"), "wb") as f:
+            f.write(b"stored before the content store")
+        assert store.find("legacy.bin", 256, 31, b"\x00" * 20) == os.path.join(root, "legacy.bin")
+        assert store.find("missing.bin", 256, 31, b"\x00" * 20) is None
+        print("✓ Stored files found by content, older uploads by name")
+
+if __name__ == "__main__":
+    test_content_store()
+    print("\n🎉 Content store tests passed!")
@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+"""
+Test the hashing worker pool and upload job tracking
+"""
+
+import sys
+import os
+import threading
+
+# Add the project root to Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fastapi import HTTPException
+
+from app.core.config import settings
+from app.services.hashing_pool import HashingPool
+
+def test_hashing_pool():
+    """Jobs move through their states and the backlog is bounded"""
+    pool = HashingPool()
+    try:
+        print("Step 1: Running a job to completion...")
+        job_id = pool.create_job("file.bin")
+        assert pool.get_job(job_id)['status'] == 'receiving'
+        assert pool.submit(job_id, sum, [1, 2, 3]).result(timeout=5) == 6
+        job = pool.get_job(job_id)
+        assert (job['status'], job['result']) == ('completed', 6)
+        print("✓ Job completed with its result")
+
+        print("Step 2: Recording a failing job...")
+        job_id = pool.create_job("broken.bin")
+        future = pool.submit(job_id, int, "not a number")
+        assert future.exception(timeout=5) is not None
+        job = pool.get_job(job_id)
+        assert job['status'] == 'failed' and "invalid literal" in job['error']
+        print("✓ Failure reported on the job")
+
+        print("Step 3: Turning uploads away when the backlog is full...")
+        release = threading.Event()
+        capacity = settings.HASH_WORKERS + settings.HASH_QUEUE_SIZE
+        receiving = pool.create_job("receiving.bin")
+        futures = [pool.submit(pool.create_job(f"slow{i}.bin"), release.wait, 5) for i in range(capacity - 1)]
+        try:
+            pool.create_job("overflow.bin")
+            assert False, "expected HTTPException"
+        except HTTPException as e:
+            assert e.status_code == 503
+        pool.fail_job(receiving, "Client went away")
+        assert pool.get_job(receiving)['status'] == 'failed'
+        futures.append(pool.submit(pool.create_job("late.bin"), release.wait, 5))
+        release.set()
+        for future in futures:
+            future.result(timeout=5)
+        assert pool.submit(pool.create_job("after.bin"), sum, [1]).result(timeout=5) == 1
+        print("✓ Uploads admitted at creation, slots freed once jobs finish or fail")
+
+        print("Step 4: Limiting torrent regeneration jobs...")
+        regenerations = [pool.create_job(f"rebuild{i}.bin", regeneration=True)
+                         for i in range(settings.HASH_REGENERATION_JOBS)]
+        try:
+            pool.create_job("rebuild.bin", regeneration=True)
+            assert False, "expected HTTPException"
+        except HTTPException as e:
+            assert e.status_code == 503
+        assert pool.submit(pool.create_job("upload.bin"), sum, [2]).result(timeout=5) == 2
+        for job_id in regenerations:
+            pool.submit(job_id, sum, [1]).result(timeout=5)
+        pool.fail_job(pool.create_job("rebuild.bin", regeneration=True), "Upload gone")
+        print("✓ Regeneration bounded without holding back uploads")
+    finally:
+        pool.stop()
+
+if __name__ == "__main__":
+    test_hashing_pool()
+    print("\n🎉 Hashing pool tests passed!")
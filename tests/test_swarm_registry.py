@@ -0,0 +1,267 @@
+#!/usr/bin/env python3
+"""
+Test the in-memory swarm registry used by announce
+"""
+
+import sys
+import os
+import hashlib
+import uuid
+import queue
+from datetime import datetime, timedelta
+
+# Add the project root to Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.core.config import settings
+from app.db import init_db
+from app.db.session import SessionLocal
+from app.models.peer import Peer
+from app.models.torrent import Torrent
+from app.services.tracker_service import TrackerService
+from app.services.swarm_registry import SwarmPeer, SwarmRegistry, swarm_registry, PEER_TIMEOUT
+from app.services.peer_reaper import peer_reaper
+from app.schemas.torrent import TorrentCreate, TorrentAnnounceRequest
+from app.utils.bittorrent import BitTorrentUtils
+from app.utils.locality import locality_key
+
+def create_test_torrent(tracker_service: TrackerService) -> str:
+    """Create a throwaway torrent and return its info hash"""
+    info_hash = hashlib.sha1(uuid.uuid4().bytes).hexdigest()
+    tracker_service.create_torrent(TorrentCreate(
+        name=f"swarm_test_{info_hash[:8]}.bin",
+        file_size=1024,
+        piece_length=256,
+        info_hash=info_hash,
+        num_pieces=4,
+        pieces_hash=b"\x00" * 80
+    ))
+    return info_hash
+
+def announce(tracker_service: TrackerService, info_hash: str, peer_id: str, port: int,
+             left: int = 0, event: str = None):
+    return tracker_service.announce(TorrentAnnounceRequest(
+        info_hash=info_hash,
+        peer_id=peer_id,
+        port=port,
+        left=left,
+        event=event
+    ), "10.0.0.1")
+
+def test_swarm_registry():
+    """Announces are answered from memory and written through to the database"""
+    init_db()
+    db = SessionLocal()
+    try:
+        tracker_service = TrackerService(db)
+        info_hash = create_test_torrent(tracker_service)
+        suffix = info_hash[:8]
+
+        print("Step 1: Announcing a seeder and a leecher...")
+        response = announce(tracker_service, info_hash, f"SEED{suffix}", 7001, left=0)
+        assert response.peers == []
+        response = announce(tracker_service, info_hash, f"LEECH{suffix}", 7002, left=512, event="started")
+        assert [p.peer_id for p in response.peers] == [f"SEED{suffix}"]
+        assert tracker_service.get_peer_count(info_hash) == 2  # Before write-behind flushes
+        print("✓ Peer list and count served from the swarm")
+
+        print("Step 2: Checking write-through to the database...")
+        swarm_registry.flush()
+        db.expire_all()
+        torrent = db.query(Torrent).filter(Torrent.info_hash == info_hash).first()
+        assert db.query(Peer).filter(Peer.torrent_id == torrent.id).count() == 2
+        assert (torrent.seeders, torrent.leechers) == (1, 1)
+        print("✓ Peers and counters persisted")
+
+        print("Step 3: Stopping the leecher...")
+        response = announce(tracker_service, info_hash, f"LEECH{suffix}", 7002, left=512, event="stopped")
+        assert response.peers == []
+        swarm_registry.flush()
+        db.expire_all()
+        assert db.query(Peer).filter(Peer.torrent_id == torrent.id).count() == 1
+        print("✓ Stopped peer removed")
+
+        print("Step 4: Announcing with compact=1...")
+        packed = tracker_service.announce_compact(TorrentAnnounceRequest(
+            info_hash=info_hash,
+            peer_id=f"CMP{suffix}",
+            port=7003,
+            left=512,
+            compact=1
+        ), "10.0.0.2")
+        assert BitTorrentUtils.unpack_compact_peers(packed) == [("10.0.0.1", 7001)]
+        print("✓ Compact peer list packed")
+
+        print("Step 5: Reconciling counters...")
+        swarm = swarm_registry.get_swarm(info_hash, db)
+        assert swarm.counts() == (1, 1)
+        swarm.peers[f"CMP{suffix}"].last_announce -= PEER_TIMEOUT
+        swarm.seeders = 5  # Simulate drift
+        swarm_registry.reconcile()
+        swarm_registry.flush()
+        db.expire_all()
+        torrent = db.query(Torrent).filter(Torrent.info_hash == info_hash).first()
+        assert swarm.counts() == (1, 0)
+        assert (torrent.seeders, torrent.leechers) == (1, 0)
+        print("✓ Expired peer dropped and counters fixed")
+
+        print("Step 6: Reaping expired peers in batches...")
+        stale_time = datetime.utcnow() - PEER_TIMEOUT - timedelta(minutes=1)
+        for i in range(3):
+            db.add(Peer(peer_id=f"OLD{i}{suffix}", ip_address="10.0.0.9", port=7100 + i,
+                        torrent_id=torrent.id, left=0, is_seeder=True, last_announce=stale_time))
+        db.commit()
+        assert peer_reaper.reap(batch_size=2) >= 3
+        assert db.query(Peer).filter(Peer.peer_id.like(f"OLD%{suffix}")).count() == 0
+        print("✓ Expired peers deleted")
+
+        print("Step 7: Re-announcing from the same ip:port with a new peer ID...")
+        announce(tracker_service, info_hash, f"RESTART{suffix}", 7001, left=0)
+        swarm_registry.flush()
+        peer_ids = {p.peer_id for p in db.query(Peer).filter(Peer.port == 7001, Peer.torrent_id == torrent.id)}
+        assert peer_ids == {f"RESTART{suffix}"}
+        assert swarm.counts() == (1, 0)
+        print("✓ Old peer ID replaced")
+
+        print("Step 8: Group-committing announces through the background writer...")
+        swarm_registry.start()
+        try:
+            for round_number in range(3):
+                for i in range(20):
+                    announce(tracker_service, info_hash, f"G{i}{suffix}", 7300 + i, left=round_number)
+            swarm_registry.flush()
+        finally:
+            swarm_registry.stop()
+        db.expire_all()
+        rows = db.query(Peer).filter(Peer.torrent_id == torrent.id, Peer.peer_id.like(f"G%{suffix}")).all()
+        assert len(rows) == 20 and all(row.left == 2 for row in rows)
+        assert all(p.id is not None for p in swarm.peers.values())
+        print("✓ Batched writes persisted the latest peer state")
+
+        print("Step 9: Throttling announces faster than min_interval...")
+        for _ in range(settings.ANNOUNCE_BURST):
+            first = announce(tracker_service, info_hash, f"EAGER{suffix}", 7400, left=512)
+        eager = swarm.peers[f"EAGER{suffix}"]
+        announced_at = eager.last_announce
+        cached = announce(tracker_service, info_hash, f"EAGER{suffix}", 7400, left=512)
+        assert [p.peer_id for p in cached.peers] == [p.peer_id for p in first.peers]
+        assert eager.last_announce == announced_at
+        announce(tracker_service, info_hash, f"EAGER{suffix}", 7400, left=512, event="")
+        assert eager.last_announce == announced_at  # event= with no value is throttled too
+        completed = swarm.completed
+        announce(tracker_service, info_hash, f"EAGER{suffix}", 7400, left=0, event="completed")
+        assert swarm.completed == completed + 1 and eager.is_seeder
+        for _ in range(settings.ANNOUNCE_BURST + 2):
+            announce(tracker_service, info_hash, f"EAGER{suffix}", 7400, left=0, event="completed")
+        assert swarm.completed == completed + 1  # Repeated by a seeder: no longer counted
+        assert eager.tokens < 1
+        print("✓ Over-eager announce answered from cache, state changes still applied")
+
+        print("Step 10: Writing a batch of announces as one queued item...")
+        swarm_registry.start()
+        try:
+            with swarm_registry.batch():
+                for i in range(5):
+                    announce(tracker_service, info_hash, f"B{i}{suffix}", 7700 + i, left=0)
+                assert swarm_registry.write_queue.qsize() == 0
+            swarm_registry.flush()
+        finally:
+            swarm_registry.stop()
+        db.expire_all()
+        assert db.query(Peer).filter(Peer.torrent_id == torrent.id, Peer.peer_id.like(f"B_{suffix}")).count() == 5
+        print("✓ Batched announces persisted together")
+
+        print("Step 11: Selecting peers by role...")
+        info_hash = create_test_torrent(tracker_service)
+        for i in range(4):
+            announce(tracker_service, info_hash, f"RS{i}{suffix}", 7800 + i, left=0)
+        for i in range(6):
+            announce(tracker_service, info_hash, f"RL{i}{suffix}", 7900 + i, left=100 * (i + 1))
+        swarm = swarm_registry.get_swarm(info_hash, db)
+        seeder_view = swarm.select_peers(10, is_seeder=True)
+        assert len(seeder_view) == 6 and not any(p.is_seeder for p in seeder_view)
+        oversample = settings.PEER_SELECTION_OVERSAMPLE
+        settings.PEER_SELECTION_OVERSAMPLE = 10  # Draw every leecher, so the most complete win
+        try:
+            selected = swarm.select_peers(4, is_seeder=False)
+        finally:
+            settings.PEER_SELECTION_OVERSAMPLE = oversample
+        assert [p.is_seeder for p in selected] == [True, True, False, False]
+        assert sorted(p.left for p in selected if not p.is_seeder) == [100, 200]
+        assert len(swarm.select_peers(10, is_seeder=False)) == 10  # Seeders short, leechers fill in
+        print("✓ Seeders get leechers, leechers get seeders and the most complete leechers")
+
+        print("Step 12: Preferring nearby peers...")
+        locality, remote_share = settings.PEER_LOCALITY, settings.PEER_LOCALITY_REMOTE_SHARE
+        settings.PEER_LOCALITY, settings.PEER_LOCALITY_REMOTE_SHARE = "subnet", 0.25
+        try:
+            info_hash = create_test_torrent(tracker_service)
+            swarm = swarm_registry.get_swarm(info_hash, db)
+            for i in range(4):
+                swarm_registry.announce(swarm, f"NEAR{i}{suffix}", "10.0.5.1", 8000 + i, 0, 0, left=0)
+                swarm_registry.announce(swarm, f"FAR{i}{suffix}", "10.0.6.1", 8100 + i, 0, 0, left=0)
+            peers = swarm_registry.announce(swarm, f"LOCAL{suffix}", "10.0.5.200", 8200, 0, 0, left=512, max_peers=4)
+            assert [p.ip_address for p in peers] == ["10.0.5.1"] * 3 + ["10.0.6.1"]
+            swarm.move_peer(swarm.peers[f"NEAR0{suffix}"], "10.0.6.2", 8000)
+            assert len(swarm.local_peers[("10.0.5.0/24", True)]) == 3
+
+            # Remote slots go to nearby peers only when the rest of the swarm runs out
+            settings.PEER_LOCALITY_REMOTE_SHARE = 0.5
+            swarm = swarm_registry.get_swarm(create_test_torrent(tracker_service), db)
+            for i in range(4):
+                swarm_registry.announce(swarm, f"NEAR{i}{suffix}", "10.0.5.1", 8000 + i, 0, 0, left=0)
+            swarm_registry.announce(swarm, f"FAR{suffix}", "10.0.6.1", 8100, 0, 0, left=0)
+            peers = swarm_registry.announce(swarm, f"LOCAL{suffix}", "10.0.5.200", 8200, 0, 0, left=512, max_peers=4)
+            assert sorted(p.ip_address for p in peers) == ["10.0.5.1"] * 3 + ["10.0.6.1"]
+
+            # A swarm made mostly of one group: the remote draw gives up early, nearby peers fill in
+            swarm = swarm_registry.get_swarm(create_test_torrent(tracker_service), db)
+            for i in range(2000):
+                swarm.add_peer(SwarmPeer(f"CROWD{i}{suffix}", "10.0.5.1", 10000 + i, swarm.torrent_id))
+            peers = swarm.select_peers(10, False, locality="10.0.5.0/24")
+            assert len(peers) == 10
+        finally:
+            settings.PEER_LOCALITY, settings.PEER_LOCALITY_REMOTE_SHARE = locality, remote_share
+
+        settings.PEER_LOCALITY = "site"
+        sites, settings.PEER_LOCALITY_SITES = settings.PEER_LOCALITY_SITES, {"paris": ["10.1.0.0/16"]}
+        try:
+            assert locality_key("10.1.200.7") == "site:paris"
+            assert locality_key("10.2.200.7") == "10.2.200.0/24"
+        finally:
+            settings.PEER_LOCALITY, settings.PEER_LOCALITY_SITES = locality, sites
+        print("✓ Same-subnet and same-site peers listed first")
+
+        print("Step 13: Shedding writes when the queue is full...")
+        registry = SwarmRegistry()
+        registry.running = True  # As if started, but nothing drains the queue
+        registry.write_queue = queue.Queue(maxsize=1)
+        for completed in (1, 2):
+            registry._enqueue(('torrent', torrent.id, {'completed': completed}))
+        assert registry.write_queue.qsize() == 1 and registry.shed_writes == 1
+        db.add(Peer(peer_id=f"GONE{suffix}", ip_address="10.0.0.8", port=7300,
+                    torrent_id=torrent.id, left=0, is_seeder=True, last_announce=datetime.utcnow()))
+        db.commit()
+        registry._enqueue(('delete', torrent.id, f"GONE{suffix}"))
+        assert registry.shed_writes == 1 and len(registry.overflow_deletes) == 1
+        registry.running = False
+        registry.start()  # The writer takes the queued write and the delete set aside
+        registry.stop()
+        db.expire_all()
+        assert db.query(Peer).filter(Peer.peer_id == f"GONE{suffix}").count() == 0
+        print("✓ Full queue sheds instead of blocking, deletes kept")
+
+        print("Step 14: Retrying a failed group commit in halves...")
+        registry._write([
+            ('torrent', torrent.id, {'completed': 77}),
+            ('torrent', torrent.id, {'no_such_column': 1})
+        ])
+        db.expire_all()
+        assert db.query(Torrent).filter(Torrent.id == torrent.id).first().completed == 77
+        print("✓ Only the failing write was dropped")
+    finally:
+        db.close()
+
+if __name__ == "__main__":
+    test_swarm_registry()
+    print("\n🎉 Swarm registry tests passed!")
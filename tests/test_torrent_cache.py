@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+"""
+Test the LRU cache of info_hash lookups
+"""
+
+import sys
+import os
+import hashlib
+import uuid
+
+# Add the project root to Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.db import init_db
+from app.db.session import SessionLocal
+from app.services.tracker_service import TrackerService
+from app.services.torrent_cache import TorrentCache, torrent_cache
+from app.schemas.torrent import TorrentCreate
+from tests.test_swarm_registry import create_test_torrent, announce
+
+def test_torrent_cache():
+    """Hot and unknown info hashes are answered from the cache"""
+    init_db()
+    db = SessionLocal()
+    try:
+        tracker_service = TrackerService(db)
+        info_hash = create_test_torrent(tracker_service)
+
+        print("Step 1: Looking up a torrent repeatedly...")
+        hits = torrent_cache.hits
+        for _ in range(3):
+            assert tracker_service.get_torrent(info_hash).info_hash == info_hash
+        assert torrent_cache.hits == hits + 3
+        print("✓ Repeat lookups served from the cache")
+
+        print("Step 2: Caching an unknown hash, then creating it...")
+        unknown_hash = hashlib.sha1(uuid.uuid4().bytes).hexdigest()
+        assert tracker_service.get_torrent(unknown_hash) is None
+        assert torrent_cache.lookup(unknown_hash) == (True, None)
+        tracker_service.create_torrent(TorrentCreate(
+            name="cache_test.bin",
+            file_size=1024,
+            piece_length=256,
+            info_hash=unknown_hash,
+            num_pieces=4,
+            pieces_hash=b"\x00" * 80
+        ))
+        assert tracker_service.get_torrent(unknown_hash).name == "cache_test.bin"
+        print("✓ Negative entry replaced on create")
+
+        print("Step 3: Keeping counters in step with announces...")
+        announce(tracker_service, info_hash, f"CACHE{info_hash[:8]}", 7500, left=0, event="completed")
+        torrent = tracker_service.get_torrent(info_hash)
+        assert (torrent.seeders, torrent.completed) == (1, 1)
+        print("✓ Cached counters updated by the registry writer")
+
+        print("Step 4: Evicting the least recently used entry...")
+        cache = TorrentCache(max_size=2)
+        first, second = tracker_service.get_torrent(info_hash), tracker_service.get_torrent(unknown_hash)
+        cache.put(first.info_hash, first)
+        cache.put(second.info_hash, second)
+        cache.lookup(first.info_hash)
+        cache.put("0" * 40, None)
+        assert cache.lookup(second.info_hash) == (False, None)
+        assert cache.lookup(first.info_hash) == (True, first)
+        assert second.id not in cache.info_hashes
+        print("✓ Cache stays bounded")
+    finally:
+        db.close()
+
+if __name__ == "__main__":
+    test_torrent_cache()
+    print("\n🎉 Torrent cache tests passed!")
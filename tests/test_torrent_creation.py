@@ -6,11 +6,12 @@ Test script to isolate the torrent creation issue
 import sys
 import os
 import traceback
+import tempfile
 
 # Add the project root to Python path
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
-from app.utils.torrent_generator import TorrentGenerator
+from app.utils.torrent_generator import TorrentGenerator, PieceHasher
 from app.schemas.torrent import TorrentCreate
 
 def test_torrent_creation():
@@ -72,7 +73,34 @@ def test_torrent_creation():
         traceback.print_exc()
         return False
 
+def test_streamed_piece_hashes():
+    """Hashing chunks as they arrive matches hashing the saved file"""
+    piece_length = TorrentGenerator.DEFAULT_PIECE_LENGTH
+    data = os.urandom(piece_length * 3 + piece_length // 2)
+    
+    with tempfile.NamedTemporaryFile(delete=False) as f:
+        f.write(data)
+        file_path = f.name
+    try:
+        hasher = PieceHasher(piece_length)
+        for start in range(0, len(data), 100000):  # Chunks that straddle piece boundaries
+            hasher.update(data[start:start + 100000])
+        
+        assert hasher.finish() == TorrentGenerator.calculate_piece_hashes(file_path, piece_length)
+        assert hasher.length == len(data)
+        
+        streamed = TorrentGenerator.build_torrent_metadata(
+            os.path.basename(file_path), hasher.length, hasher.piece_hashes,
+            "http://localhost:8000/api/tracker/announce", piece_length, int(os.path.getctime(file_path))
+        )
+        from_disk = TorrentGenerator.create_torrent_metadata(file_path, "http://localhost:8000/api/tracker/announce")
+        assert streamed == from_disk
+        print("✓ Streamed piece hashes match the file on disk")
+    finally:
+        os.unlink(file_path)
+
 if __name__ == "__main__":
+    test_streamed_piece_hashes()
     success = test_torrent_creation()
     if success:
         print("\n🎉 All tests passed!")
@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+"""
+Test keyset pagination of the torrent list deferred piece hash loading and stored .torrent files
+"""
+
+import sys
+import os
+import base64
+import tempfile
+from contextlib import contextmanager
+
+# Add the project root to Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fastapi import HTTPException
+from sqlalchemy import create_engine, inspect, select
+from sqlalchemy.orm import sessionmaker
+
+from app.db.base import Base
+from app.models.torrent import Torrent
+from app.services.tracker_service import TrackerService
+from app.api.tracker import _etag_matches, _torrent_file_matches
+from app.utils.torrent_generator import TorrentGenerator
+from tests.test_swarm_registry import create_test_torrent
+
+@contextmanager
+def isolated_session():
+    """Session on a fresh temporary database, so row counts never depend on earlier runs"""
+    with tempfile.TemporaryDirectory() as data_dir:
+        engine = create_engine(f"sqlite:///{os.path.join(data_dir, 'torrents.db')}")
+        Base.metadata.create_all(bind=engine)
+        db = sessionmaker(autocommit=False, autoflush=False, bind=engine)()
+        try:
+            yield db
+        finally:
+            db.close()
+            engine.dispose()
+
+def expected_ids(db, *order):
+    return list(db.execute(select(Torrent.id).order_by(*order)).scalars())
+
+def collect_pages(tracker_service: TrackerService, sort: str, limit: int):
+    """Walk every page of a sort and return the ids in page order"""
+    ids, cursor = [], None
+    while True:
+        page, cursor = tracker_service.list_torrents(limit, sort, cursor)
+        assert len(page) <= limit
+        ids.extend(t.id for t in page)
+        if cursor is None:
+            return ids
+
+def test_torrent_list():
+    """Paging through every sort returns each torrent once, in sort order"""
+    with isolated_session() as db:
+        tracker_service = TrackerService(db)
+        for _ in range(7):
+            create_test_torrent(tracker_service)
+        torrents = db.query(Torrent).all()
+
+        print("Step 1: Paging by created_at...")
+        assert collect_pages(tracker_service, "created_at", 3) == expected_ids(db, Torrent.id.desc())
+        print("✓ Newest torrents first, no duplicates")
+
+        print("Step 2: Paging by seeders and name...")
+        assert collect_pages(tracker_service, "seeders", 3) == expected_ids(db, Torrent.seeders.desc(), Torrent.id.desc())
+        assert collect_pages(tracker_service, "name", 4) == expected_ids(db, Torrent.name, Torrent.id)
+        print("✓ Pages follow the sort key with id as tie breaker")
+
+        print("Step 3: Rejecting bad sort keys and cursors...")
+        wrong_types = base64.urlsafe_b64encode(b'[{"a": 1}, 1]').decode()
+        for sort, cursor in (("size", None), ("name", "not-a-cursor"), ("name", "WzFd"),
+                             ("name", wrong_types), ("created_at", base64.urlsafe_b64encode(b'["1"]').decode())):
+            try:
+                tracker_service.list_torrents(3, sort, cursor)
+                assert False, "expected HTTPException"
+            except HTTPException as e:
+                assert e.status_code == 400
+        print("✓ Invalid requests answered with 400")
+
+        print("Step 4: Loading piece hashes only on request...")
+        db.expire_all()
+        torrent = db.query(Torrent).filter(Torrent.id == torrents[0].id).first()
+        assert "pieces_hash" not in inspect(torrent).dict
+        assert tracker_service.get_piece_hashes(torrent.info_hash) == b"\x00" * 80
+        assert tracker_service.get_piece_hashes("0" * 40) is None
+        print("✓ pieces_hash deferred from torrent queries")
+
+        print("Step 5: Storing .torrent bytes with an ETag...")
+        torrent = torrents[0]
+        assert tracker_service.get_torrent_file(torrent.info_hash) is None
+        etag = tracker_service.store_torrent_file(torrent.info_hash, b'{"info": {}}')
+        assert tracker_service.get_torrent_etag(torrent.info_hash) == etag
+        assert tracker_service.get_torrent_file(torrent.info_hash) == (b'{"info": {}}', etag)
+        db.expire_all()
+        torrent = db.query(Torrent).filter(Torrent.id == torrent.id).first()
+        assert "torrent_file" not in inspect(torrent).dict
+        for header, matches in ((f'"{etag}"', True), (f'W/"{etag}"', True), (f'"x", "{etag}"', True),
+                                ('*', True), ('"x"', False), (None, False)):
+            assert _etag_matches(header, etag) == matches
+        legacy = TorrentGenerator.build_torrent_metadata("same.bin", 10, [b"\x00" * 20], "http://localhost/announce")
+        legacy_bytes = TorrentGenerator.serialize_torrent(legacy)
+        assert _torrent_file_matches(legacy_bytes, legacy['info_hash'])
+        assert not _torrent_file_matches(legacy_bytes, torrent.info_hash)  # Same name, other torrent
+        assert not _torrent_file_matches(b"not json", legacy['info_hash'])
+        print("✓ Stored bytes deferred and revalidated by ETag, legacy files checked by info hash")
+
+if __name__ == "__main__":
+    test_torrent_list()
+    print("\n🎉 Torrent list tests passed!")